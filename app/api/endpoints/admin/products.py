@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Literal, Optional, Union
+from typing import List, Literal, Optional, Union
 from app.models.product import ProductBase, ProductCreate, ProductUpdate, ProductStatus
 from app.models.user import UserBase
 from app.core.security import get_current_admin
-from app.core.validators import ObjectIdParam
+from app.core.validators import CursorQuery, ObjectIdParam
+from app.utils.pagination import check_cursor, page_response, supports_cursor
 from app.services.product import ProductService
 from app.core.config import settings
 from decimal import Decimal
@@ -17,6 +18,14 @@ class SortOrder(str, Enum):
     DESC = "desc"
 
 
+def validate_image_urls(images: List[str]) -> None:
+    """Ensure every image URL points to our bucket"""
+    prefix = settings.AWS_BUCKET_URL
+    invalid_url = next((url for url in images if not url.startswith(prefix)), None)
+    if invalid_url is not None:
+        raise HTTPException(status_code=400, detail=f"Invalid image URL: {invalid_url}")
+
+
 @router.post("/", response_model=ProductBase)
 async def create_product(
     product_data: ProductCreate,
@@ -25,12 +34,7 @@ async def create_product(
 ):
     """Create a new product"""
     # Validate image URLs
-    if product_data.images:
-        for image_url in product_data.images:
-            if not image_url.startswith(settings.AWS_BUCKET_URL):
-                raise HTTPException(
-                    status_code=400, detail=f"Invalid image URL: {image_url}"
-                )
+    validate_image_urls(product_data.images)
 
     return await product_service.create_product(product_data)
 
@@ -50,12 +54,17 @@ async def get_products(
     ),
     min_price: Optional[Decimal] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[Decimal] = Query(None, ge=0, description="Maximum price"),
+    after_id: CursorQuery = None,
+    include_total: bool = Query(
+        True, description="Count total items (skip for faster responses)"
+    ),
     admin: UserBase = Depends(get_current_admin),
     product_service: ProductService = Depends(),
 ):
     """Get all products with pagination and filters"""
+    check_cursor(after_id, sort_by, search)
+
     try:
-        print("sort_by123", sort_by)
         # Convert sort_order to string format expected by service
         sort_order_str = "desc" if sort_order == SortOrder.DESC else "asc"
 
@@ -70,20 +79,19 @@ async def get_products(
             status=status,
             min_price=min_price,
             max_price=max_price,
+            after_id=after_id,
+            include_total=include_total,
         )
 
-        # Calculate total pages
-        total_pages = (total + size - 1) // size
-
-        return {
-            "items": products,
-            "total": total,
-            "page": page,
-            "size": size,
-            "pages": total_pages,
-            "sort_by": sort_by,
-            "sort_order": sort_order,
-        }
+        return page_response(
+            products,
+            total,
+            page,
+            size,
+            sort_by,
+            sort_order,
+            cursor=supports_cursor(sort_by, search),
+        )
 
     except Exception as e:
         if "not found" in str(e).lower():
@@ -115,11 +123,7 @@ async def update_product(
     """Update product data"""
     # Validate image URLs if updating
     if product_data.images is not None:
-        for image_url in product_data.images:
-            if not image_url.startswith(settings.AWS_BUCKET_URL):
-                raise HTTPException(
-                    status_code=400, detail=f"Invalid image URL: {image_url}"
-                )
+        validate_image_urls(product_data.images)
 
     return await product_service.update_product(str(product_id), product_data)
 
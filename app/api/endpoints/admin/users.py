@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Literal, Optional, Union
 from app.models.user import UserResponse, UserRole, UserUpdateByAdmin, UserBase
 from app.core.security import get_current_admin
-from app.core.validators import ObjectIdParam
+from app.core.validators import CursorQuery, ObjectIdParam
+from app.utils.pagination import check_cursor, page_response, supports_cursor
 from app.services.user import UserService
 from enum import Enum
 
@@ -26,10 +27,16 @@ async def get_users(
     sort_order: SortOrder = Query(
         SortOrder.ASC, description="Sort order (asc or desc)"
     ),
+    after_id: CursorQuery = None,
+    include_total: bool = Query(
+        True, description="Count total items (skip for faster responses)"
+    ),
     admin: UserBase = Depends(get_current_admin),
     user_service: UserService = Depends(),
 ):
     """Get all users with pagination and filters"""
+    check_cursor(after_id, sort_by, search)
+
     try:
         # Get users with pagination and filters
         users, total = await user_service.get_users(
@@ -39,20 +46,19 @@ async def get_users(
             sort_order=sort_order,
             search=search,
             role=role,
+            after_id=after_id,
+            include_total=include_total,
         )
 
-        # Calculate pagination info
-        total_pages = (total + size - 1) // size
-        # Prepare response
-        return {
-            "items": [UserResponse.model_validate(user.model_dump()) for user in users],
-            "total": total,
-            "page": page,
-            "size": size,
-            "pages": total_pages,
-            "sort_by": sort_by,
-            "sort_order": sort_order,
-        }
+        return page_response(
+            [UserResponse.model_validate(user) for user in users],
+            total,
+            page,
+            size,
+            sort_by,
+            sort_order,
+            cursor=supports_cursor(sort_by, search),
+        )
 
     except Exception as e:
         if "not found" in str(e).lower():
@@ -6,9 +6,9 @@ from app.models.cart import (
     CartResponse,
     CartUpsert,
 )
-from app.core.security import get_current_user
+from app.core.security import get_current_user_claims
 from app.models.product import ProductBase
-from app.models.user import UserBase, UserResponse
+from app.models.user import CurrentUserClaims
 from app.db.mongodb import MongoDB
 from bson import ObjectId
 from datetime import datetime, timezone
@@ -23,14 +23,14 @@ router = APIRouter()
 
 @router.get("/", response_model=CartResponse)
 async def get_cart(
-    current_user: UserBase = Depends(get_current_user),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     cart_service: CartService = Depends(),
     product_service: ProductService = Depends(),
 ):
     """Get user's cart"""
     cart = await cart_service.get_cart(current_user.id)
-    products = await product_service.get_products_by_ids(
-        [item.product_id for item in cart.items]
+    products = await product_service.get_product_summaries_by_ids(
+        item.product_id for item in cart.items
     )
     return build_cart_response(cart, products)
 
@@ -38,14 +38,15 @@ async def get_cart(
 @router.put("/")
 async def upsert_cart(
     cart_upsert: CartUpsert,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     cart_service: CartService = Depends(),
     product_service: ProductService = Depends(),
 ):
     """Update or insert cart items"""
-    # Validate product existence and stock
-    product_ids = [item.product_id for item in cart_upsert.items]
-    products = await product_service.get_products_by_ids(product_ids)
+    # Fetch all active products in one query, then validate existence and stock
+    products = await product_service.get_product_summaries_by_ids(
+        (item.product_id for item in cart_upsert.items), active_only=True
+    )
 
     # Create product lookup dict
     product_map = {str(p.id): p for p in products}
@@ -1,8 +1,10 @@
+import asyncio
 from fastapi import APIRouter, File, HTTPException, UploadFile, Depends
-from typing import List
-from app.core.security import get_current_user
+from typing import BinaryIO, List
+from app.core.security import get_current_user_claims
 from app.dependencies.s3 import get_s3_service
-from app.models.user import UserResponse
+from app.models.file import ImageUploadRequest, PresignedUpload
+from app.models.user import CurrentUserClaims
 from app.services.s3 import S3Service
 
 router = APIRouter()
@@ -11,55 +13,132 @@ router = APIRouter()
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB per file
 MAX_TOTAL_SIZE = 20 * 1024 * 1024  # 20MB total
 MAX_FILES = 10  # Maximum number of files
+MAX_CONCURRENT_UPLOADS = 4  # Uploads in flight per request
+UPLOAD_ATTEMPTS = 3  # Tries per file before giving up
+UPLOAD_RETRY_DELAY = 0.5  # Seconds before the first retry, doubled each time
 ALLOWED_IMAGE_TYPES = {
     "image/jpeg": [".jpg", ".jpeg"],
     "image/png": [".png"],
     "image/webp": [".webp"],
     "image/gif": [".gif"],
 }
+ALLOWED_EXTENSIONS = frozenset(
+    ext for exts in ALLOWED_IMAGE_TYPES.values() for ext in exts
+)
+ALLOWED_TYPES_MESSAGE = ", ".join(ALLOWED_IMAGE_TYPES.keys())
 
 
-def validate_image(file: UploadFile) -> int:
+def validate_image_metadata(filename: str, content_type: str, size: int) -> int:
     """
-    Validate image file size and type
+    Validate image type, extension and size
     Returns file size in bytes
     """
 
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end of file
-    size = file.file.tell()  # Get file size
-    file.file.seek(0)  # Reset file pointer
+    # Check file type
+    if content_type not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type {content_type} not allowed. Allowed types: {ALLOWED_TYPES_MESSAGE}",
+        )
 
+    # Check file extension
+    file_ext = f".{filename.split('.')[-1].lower()}" if "." in filename else ""
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, detail=f"File extension {file_ext} not allowed"
+        )
+
+    # Check file size
     if size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=400,
             detail=f"File size ({size/1024/1024:.2f}MB) exceeds maximum allowed size (5MB)",
         )
 
-    # Check file type
-    if file.content_type not in ALLOWED_IMAGE_TYPES:
+    return size
+
+
+def measure_file_size(file: BinaryIO) -> int:
+    """Get file size by seeking, may touch disk for large spooled files"""
+    file.seek(0, 2)  # Seek to end of file
+    size = file.tell()  # Get file size
+    file.seek(0)  # Reset file pointer
+    return size
+
+
+async def validate_image(file: UploadFile) -> int:
+    """
+    Validate image file type and size
+    Returns file size in bytes
+    """
+    # File size is already counted while the upload was parsed
+    size = file.size
+    if size is None:
+        # Measure in a worker thread to keep disk I/O off the event loop
+        size = await asyncio.to_thread(measure_file_size, file.file)
+
+    return validate_image_metadata(file.filename, file.content_type, size)
+
+
+def validate_total_size(total_size: int) -> None:
+    """Ensure the files of one request stay within MAX_TOTAL_SIZE"""
+    if total_size > MAX_TOTAL_SIZE:
         raise HTTPException(
             status_code=400,
-            detail=f"File type {file.content_type} not allowed. Allowed types: {', '.join(ALLOWED_IMAGE_TYPES.keys())}",
+            detail=f"Total file size ({total_size/1024/1024:.2f}MB) exceeds maximum allowed size (20MB)",
         )
 
-    # Check file extension
-    file_ext = (
-        f".{file.filename.split('.')[-1].lower()}" if "." in file.filename else ""
-    )
-    if not any(file_ext in exts for exts in ALLOWED_IMAGE_TYPES.values()):
+
+def validate_file_count(count: int) -> None:
+    """Ensure one request has between 1 and MAX_FILES files"""
+    if not count:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    if count > MAX_FILES:
         raise HTTPException(
-            status_code=400, detail=f"File extension {file_ext} not allowed"
+            status_code=400, detail=f"Too many files. Maximum allowed: {MAX_FILES}"
         )
 
-    return size
+
+@router.post("/upload/images/presign", response_model=List[PresignedUpload])
+async def presign_image_uploads(
+    images: List[ImageUploadRequest],
+    s3: S3Service = Depends(get_s3_service),
+    user: CurrentUserClaims = Depends(get_current_user_claims),
+):
+    """
+    Get presigned POSTs to upload images straight to S3
+
+    Same limits as /upload/images. For each image, POST the returned fields
+    and then the file to url; the image is then available at file_url
+    """
+    validate_file_count(len(images))
+
+    total_size = 0
+    for image in images:
+        total_size += validate_image_metadata(
+            image.filename, image.content_type, image.size
+        )
+    validate_total_size(total_size)
+
+    # Each policy caps the upload at its declared size, so S3 enforces the
+    # sizes the total was checked against
+    return [
+        s3.generate_presigned_post(
+            image.filename,
+            image.content_type,
+            max_size=image.size,
+            folder="public/images",
+        )
+        for image in images
+    ]
 
 
-@router.post("/upload/images", response_model=List[str])
+@router.post("/upload/images", response_model=List[str], deprecated=True)
 async def upload_images(
     files: List[UploadFile] = File(...),
     s3: S3Service = Depends(get_s3_service),
-    user: UserResponse = Depends(get_current_user),
+    user: CurrentUserClaims = Depends(get_current_user_claims),
 ):
     """
     Upload multiple image files
@@ -68,57 +147,52 @@ async def upload_images(
     - Maximum total size: 20MB
     - Maximum files: 10
     - Allowed types: JPEG, PNG, WebP, GIF
-    """
-    if not files:
-        raise HTTPException(status_code=400, detail="No files provided")
 
-    if len(files) > MAX_FILES:
-        raise HTTPException(
-            status_code=400, detail=f"Too many files. Maximum allowed: {MAX_FILES}"
-        )
+    Deprecated: use /upload/images/presign so files go straight to S3
+    """
+    validate_file_count(len(files))
 
-    # Check total size before processing files
-    total_size = 0
-    for file in files:
-        try:
-            size = validate_image(file)
-            total_size += size
-
-            if total_size > MAX_TOTAL_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Total file size ({total_size/1024/1024:.2f}MB) exceeds maximum allowed size (20MB)",
-                )
-        except Exception:
-            # Make sure to close files if validation fails
-            for f in files:
-                await f.close()
-            raise
+    try:
+        # Check total size before processing files
+        total_size = 0
+        for file in files:
+            total_size += await validate_image(file)
+            validate_total_size(total_size)
+
+        # Upload files concurrently, a few at a time, retrying failed uploads
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+        async def upload(file: UploadFile):
+            async with semaphore:
+                for attempt in range(UPLOAD_ATTEMPTS):
+                    try:
+                        file.file.seek(0)
+                        return await s3.upload_file(file=file, folder="public/images")
+                    except Exception as e:
+                        if attempt == UPLOAD_ATTEMPTS - 1:
+                            return e
+                        await asyncio.sleep(UPLOAD_RETRY_DELAY * 2**attempt)
+
+        results = await asyncio.gather(*(upload(file) for file in files))
+    finally:
+        # Close all files once, together, whether validation or upload failed
+        await asyncio.gather(*(file.close() for file in files), return_exceptions=True)
 
     image_urls = []
-
-    for file in files:
-        try:
-            # Upload to S3
-            file_url = await s3.upload_file(file=file, folder="public/images")
-
-            image_urls.append(file_url)
-
-        except HTTPException as e:
+    for file, result in zip(files, results):
+        if isinstance(result, HTTPException):
             # Re-raise HTTP exceptions with file name
             raise HTTPException(
-                status_code=e.status_code,
-                detail=f"Error with file {file.filename}: {e.detail}",
+                status_code=result.status_code,
+                detail=f"Error with file {file.filename}: {result.detail}",
             )
-        except Exception as e:
+        if isinstance(result, Exception):
             # Handle unexpected errors
             raise HTTPException(
                 status_code=500,
-                detail=f"Error processing file {file.filename}: {str(e)}",
+                detail=f"Error processing file {file.filename}: {str(result)}",
             )
-        finally:
-            # Always close the file
-            await file.close()
+        image_urls.append(result)
 
     return image_urls
 
@@ -127,7 +201,7 @@ async def upload_images(
 async def delete_image(
     filename: str,
     s3: S3Service = Depends(get_s3_service),
-    user: UserResponse = Depends(get_current_user),
+    user: CurrentUserClaims = Depends(get_current_user_claims),
 ):
     """Delete an image from storage"""
     try:
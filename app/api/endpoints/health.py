@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException
-from app.db.mongodb import MongoDB
+from fastapi import APIRouter, Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.dependencies.db import get_client
+from app.utils.cache import TTLCache
 
 router = APIRouter()
 
+# Reuse a successful ping briefly, so frequent probes don't each hit MongoDB.
+# Failures are not cached and an outage shows up within the TTL.
+_health_cache = TTLCache(ttl=1.5, maxsize=1)
+
 
 @router.get("/health")
-async def health_check():
+async def health_check(client: AsyncIOMotorClient = Depends(get_client)):
+    cached = _health_cache.get("health")
+    if cached is not None:
+        return cached
+
     try:
         # Check MongoDB connection
-        client = MongoDB.get_client()
         await client.admin.command("ping")
 
-        return {"status": "healthy", "database": "connected", "version": "1.0.0"}
+        result = {"status": "healthy", "database": "connected", "version": "1.0.0"}
+        _health_cache.set("health", result)
+        return result
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
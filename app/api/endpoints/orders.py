@@ -1,7 +1,8 @@
-from math import ceil
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Literal, Optional, Union
-from app.core.validators import ObjectIdParam
+from app.core.validators import CursorQuery, ObjectIdParam
 from app.models.order import (
     OrderBase,
     OrderCreate,
@@ -10,16 +11,14 @@ from app.models.order import (
     PaymentStatus,
     OrderSummary,
 )
-from app.models.product import ProductStatus
-from app.models.transaction import TransactionCreate, TransactionType
-from app.models.user import UserResponse
-from app.core.security import get_current_user
+from app.models.user import CurrentUserClaims
+from app.core.security import get_current_user_claims
+from app.utils.pagination import check_cursor, page_response, supports_cursor
 from app.services.order import OrderService
+from app.services.payment import PaymentService
 from app.services.product import ProductService
-from datetime import datetime
-
-from app.services.transaction import TransactionService
 from app.services.user import UserService
+from datetime import datetime
 
 router = APIRouter()
 
@@ -27,14 +26,15 @@ router = APIRouter()
 @router.post("/", response_model=OrderBase)
 async def create_order(
     order_data: OrderCreate,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     order_service: OrderService = Depends(),
     product_service: ProductService = Depends(),
 ):
     """Create a new order"""
     # Validate products existence and stock
-    product_ids = [item.product_id for item in order_data.items]
-    products = await product_service.get_products_by_ids(product_ids)
+    products = await product_service.get_products_by_ids(
+        item.product_id for item in order_data.items
+    )
 
     return await order_service.create_order(current_user.id, order_data, products)
 
@@ -51,10 +51,13 @@ async def get_orders(
     ),
     sort_by: Optional[str] = Query("created_at", description="Field to sort by"),
     sort_order: Optional[str] = Query("desc", description="Sort order (asc or desc)"),
-    current_user: UserResponse = Depends(get_current_user),
+    after_id: CursorQuery = None,
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     order_service: OrderService = Depends(),
 ):
     """Get user's orders with pagination and filtering"""
+    check_cursor(after_id, sort_by)
+
     orders, total = await order_service.get_orders(
         user_id=current_user.id,
         skip=(page - 1) * size,
@@ -63,23 +66,24 @@ async def get_orders(
         payment_status=payment_status,
         sort_by=sort_by,
         sort_order=sort_order,
+        after_id=after_id,
     )
 
-    return {
-        "items": orders,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": ceil(total / size),
-        "sort_by": sort_by,
-        "sort_order": sort_order,
-    }
+    return page_response(
+        orders,
+        total,
+        page,
+        size,
+        sort_by,
+        sort_order,
+        cursor=supports_cursor(sort_by),
+    )
 
 
 @router.get("/{order_id}", response_model=OrderBase)
 async def get_order(
     order_id: str,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     order_service: OrderService = Depends(),
 ):
     """Get order details"""
@@ -90,7 +94,7 @@ async def get_order(
 async def update_order(
     order_id: str,
     order_data: OrderUpdate,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     order_service: OrderService = Depends(),
 ):
     """Update order
@@ -116,17 +120,19 @@ async def update_order(
 @router.post("/{order_id}/checkout")
 async def checkout_order(
     order_id: ObjectIdParam,
-    current_user: UserResponse = Depends(get_current_user),
-    transaction_service: TransactionService = Depends(),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     order_service: OrderService = Depends(),
-    user_service: UserService = Depends(),
     product_service: ProductService = Depends(),
+    user_service: UserService = Depends(),
+    payment_service: PaymentService = Depends(),
 ):
     """Order payment using balance"""
-    CURRENT_BALANCE = current_user.balance
 
-    # Get order details first
-    order = await order_service.get_order_by_id(order_id, current_user.id)
+    # Get order details and the user's balance together
+    order, balance = await asyncio.gather(
+        order_service.get_order_by_id(order_id, current_user.id),
+        user_service.get_balance(current_user.id),
+    )
 
     # Validate order status
     if order.status != OrderStatus.PENDING:
@@ -134,68 +140,20 @@ async def checkout_order(
     if order.payment_status not in [PaymentStatus.PENDING, PaymentStatus.FAILED]:
         raise HTTPException(status_code=400, detail="Order is not pending or failed")
 
-    # Validate user balance
-    if CURRENT_BALANCE < order.total_amount:
+    # Fail early without opening a transaction, the payment itself still
+    # re-checks the balance atomically
+    if balance < order.total_amount:
         raise HTTPException(status_code=400, detail="Insufficient balance")
 
-    # Validate order items in stock
-    products = await product_service.get_products_by_ids(
-        [item.product_id for item in order.items]
-    )
-    if len(products) != len(order.items):
-        raise HTTPException(status_code=400, detail="Some products not found")
-
-    product_map = {product.id: product for product in products}
-    for item in order.items:
-        product = product_map.get(item.product_id)
-        if product.status != ProductStatus.ACTIVE:
-            raise HTTPException(status_code=400, detail="Product is not active")
-        if product.stock < item.quantity:
-            raise HTTPException(status_code=400, detail="Insufficient stock")
-
-    transaction_data = TransactionCreate(
-        type=TransactionType.PAYMENT,
-        amount=order.total_amount,
-        description=f"Payment for order #{order_id}",
-    )
+    # Validate order items are active and in stock
+    await product_service.validate_order_items(order)
 
     try:
-        # Update user balance first (atomic operation)
-        await user_service.update_balance(
-            user_id=current_user.id,
-            current_balance=CURRENT_BALANCE,
-            amount=order.total_amount,
-            operation="subtract",
-        )
-
-        # Insert transaction
-        transaction = await transaction_service.create_transaction(
-            transaction_data=transaction_data,
-            user_id=current_user.id,
-            current_balance=CURRENT_BALANCE,
-        )
-
-        await order_service.update_order_payment_status(
-            order_id, PaymentStatus.PAID, transaction.id
-        )
-
+        await payment_service.pay_order(current_user.id, order)
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error here
-        await order_service.update_order_payment_status(order_id, PaymentStatus.FAILED)
         raise HTTPException(status_code=500, detail=f"Payment failed: {str(e)}")
 
-    try:
-        # Update product stock after order payment
-        await product_service.update_stock_after_order_payment(order)
-
-        # Update order status
-        await order_service.update_order_status(order_id, OrderStatus.CONFIRMED)
-
-        return {"message": "Order processed successfully"}
-
-    except Exception as e:
-        # Log the error here
-        await order_service.update_order_status(order_id, OrderStatus.FAILED)
-        raise HTTPException(
-            status_code=500, detail=f"Order processing failed: {str(e)}"
-        )
+    return {"message": "Order processed successfully"}
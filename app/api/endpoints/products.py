@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
 from app.models.product import ProductBase, ProductStatus
-from app.core.validators import ObjectIdParam
+from app.core.validators import CursorQuery, ObjectIdParam
+from app.utils.pagination import check_cursor, page_response, supports_cursor
 from app.services.product import ProductService
 from decimal import Decimal
 from enum import Enum
@@ -26,12 +27,15 @@ async def get_products(
     ),
     min_price: Optional[Decimal] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[Decimal] = Query(None, ge=0, description="Maximum price"),
+    after_id: CursorQuery = None,
     product_service: ProductService = Depends(),
 ):
     """
     Get public products list
     Only returns active products
     """
+    check_cursor(after_id, sort_by, search)
+
     try:
         # Convert sort_order to string format expected by service
         sort_order_str = "desc" if sort_order == SortOrder.DESC else "asc"
@@ -47,20 +51,18 @@ async def get_products(
             status=ProductStatus.ACTIVE,  # Only active products for public
             min_price=min_price,
             max_price=max_price,
+            after_id=after_id,
         )
 
-        # Calculate total pages
-        total_pages = (total + size - 1) // size
-
-        return {
-            "items": products,
-            "total": total,
-            "page": page,
-            "size": size,
-            "pages": total_pages,
-            "sort_by": sort_by,
-            "sort_order": sort_order,
-        }
+        return page_response(
+            products,
+            total,
+            page,
+            size,
+            sort_by,
+            sort_order,
+            cursor=supports_cursor(sort_by, search),
+        )
 
     except Exception as e:
         if "not found" in str(e).lower():
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from app.core.security import get_current_user
+from pymongo.errors import PyMongoError
+from app.core.security import get_current_user_claims
+from app.core.validators import CursorQuery
 from app.models.transaction import (
     TransactionCreate,
     TransactionDeposit,
@@ -8,7 +10,8 @@ from app.models.transaction import (
     TransactionBase,
     TransactionWithdraw,
 )
-from app.models.user import UserResponse
+from app.models.user import CurrentUserClaims
+from app.utils.pagination import check_cursor, page_response, supports_cursor
 from app.services.transaction import TransactionService
 from app.services.user import UserService
 from decimal import Decimal
@@ -16,16 +19,19 @@ from typing import Literal, Optional, Union
 
 router = APIRouter()
 
+TRANSACTION_SORT_FIELDS = frozenset(
+    {"id", "type", "amount", "balance", "status", "created_at"}
+)
+
 
 @router.post("/deposit", response_model=TransactionBase)
 async def deposit_money(
     transaction_deposit: TransactionDeposit,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     transaction_service: TransactionService = Depends(),
     user_service: UserService = Depends(),
 ):
     """Deposit money to user balance"""
-    CURRENT_BALANCE = current_user.balance
     transaction_data = TransactionCreate(
         type=TransactionType.DEPOSIT,
         amount=transaction_deposit.amount,
@@ -34,9 +40,8 @@ async def deposit_money(
 
     try:
         # Update user balance first (atomic operation)
-        await user_service.update_balance(
+        balance = await user_service.update_balance(
             user_id=current_user.id,
-            current_balance=CURRENT_BALANCE,
             amount=transaction_deposit.amount,
             operation="add",
         )
@@ -45,9 +50,11 @@ async def deposit_money(
         return await transaction_service.create_transaction(
             transaction_data=transaction_data,
             user_id=current_user.id,
-            current_balance=CURRENT_BALANCE,
+            balance=balance,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error here
         raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
@@ -56,12 +63,11 @@ async def deposit_money(
 @router.post("/withdraw", response_model=TransactionBase)
 async def withdraw_money(
     transaction_withdraw: TransactionWithdraw,
-    current_user: UserResponse = Depends(get_current_user),
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     transaction_service: TransactionService = Depends(),
     user_service: UserService = Depends(),
 ):
     """Withdraw money from user balance"""
-    CURRENT_BALANCE = current_user.balance
     transaction_data = TransactionCreate(
         type=TransactionType.WITHDRAW,
         amount=transaction_withdraw.amount,
@@ -70,9 +76,8 @@ async def withdraw_money(
 
     try:
         # Update user balance first (atomic operation)
-        await user_service.update_balance(
+        balance = await user_service.update_balance(
             user_id=current_user.id,
-            current_balance=CURRENT_BALANCE,
             amount=transaction_withdraw.amount,
             operation="subtract",
         )
@@ -81,9 +86,11 @@ async def withdraw_money(
         return await transaction_service.create_transaction(
             transaction_data=transaction_data,
             user_id=current_user.id,
-            current_balance=CURRENT_BALANCE,
+            balance=balance,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error here
         raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
@@ -103,10 +110,15 @@ async def get_transactions(
     status: Optional[Union[TransactionStatus, Literal[""]]] = Query(
         None, description="Transaction status"
     ),
-    current_user: UserResponse = Depends(get_current_user),
+    after_id: CursorQuery = None,
+    current_user: CurrentUserClaims = Depends(get_current_user_claims),
     transaction_service: TransactionService = Depends(),
 ):
     """Get user's transaction history with pagination, filtering and sorting"""
+    if sort_by and sort_by not in TRANSACTION_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort_by}")
+    check_cursor(after_id, sort_by)
+
     try:
         # Get transactions with pagination and filters
         transactions, total = await transaction_service.get_user_transactions(
@@ -119,26 +131,19 @@ async def get_transactions(
             min_amount=min_amount,
             max_amount=max_amount,
             status=status,
+            after_id=after_id,
         )
-
-        # Calculate total pages
-        total_pages = (total + size - 1) // size
-
-        return {
-            "items": transactions,
-            "total": total,
-            "page": page,
-            "size": size,
-            "pages": total_pages,
-            "sort_by": sort_by,
-            "sort_order": sort_order,
-        }
-
-    except Exception as e:
-        if "not found" in str(e).lower():
-            raise HTTPException(
-                status_code=400, detail=f"Invalid sort field: {sort_by}"
-            )
+    except PyMongoError as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching transactions: {str(e)}"
         )
+
+    return page_response(
+        transactions,
+        total,
+        page,
+        size,
+        sort_by,
+        sort_order,
+        cursor=supports_cursor(sort_by),
+    )
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,12 +14,34 @@ class Settings:
     )
     DB_NAME: str = os.getenv("MONGODB_DB", "fastapi-shop")
 
+    # MongoDB connection pool settings (per uvicorn worker)
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
+    MONGODB_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000"))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = int(
+        os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2000")
+    )
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(
+        os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "3000")
+    )
+    # Wire compressors in order of preference, zstd and snappy need extra packages
+    MONGODB_COMPRESSORS: str = os.getenv("MONGODB_COMPRESSORS", "zlib")
+
+    # List totals stop counting at this many matches
+    LIST_COUNT_LIMIT: int = int(os.getenv("LIST_COUNT_LIMIT", "10000"))
+
+    # Processes for password hashing (per uvicorn worker)
+    PASSWORD_HASH_WORKERS: int = int(
+        os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))
+    )
+
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
     )
+    ACCESS_TOKEN_EXPIRE: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     CORS_ORIGINS: list = [
         "http://localhost:5173",
@@ -1,55 +1,112 @@
+import hashlib
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
+import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from app.core.config import settings
-from app.models.user import UserBase, UserRole
+from app.models.user import CurrentUserClaims, UserBase, UserRole
 from app.services.user import UserService
+from app.utils.cache import TTLCache
 
 oauth2_scheme = HTTPBearer()
 
+# Signing inputs resolved once instead of on every encode and decode
+_SECRET_KEY = settings.SECRET_KEY
+_ALGORITHM = settings.ALGORITHM
+_ALGORITHMS = [_ALGORITHM]
+# Require exp and skip checks for claims these tokens never carry
+_DECODE_OPTIONS = {
+    "require": ["exp"],
+    "verify_aud": False,
+    "verify_iat": False,
+    "verify_nbf": False,
+}
+
+# Verified token payloads by token hash, so repeat requests with a token skip
+# the decode without raw tokens being kept in memory
+_token_cache = TTLCache(ttl=30, maxsize=10000)
+
+# Recently issued tokens by user id, dropped a minute before the token expires
+# so a reused token always has time left
+_issued_token_cache = TTLCache(
+    ttl=max(settings.ACCESS_TOKEN_EXPIRE.total_seconds() - 60, 0), maxsize=10000
+)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+    expire = datetime.now(timezone.utc) + (
+        expires_delta or settings.ACCESS_TOKEN_EXPIRE
+    )
+    return jwt.encode({**data, "exp": expire}, _SECRET_KEY, algorithm=_ALGORITHM)
+
 
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+def issue_access_token(user_id: str, username: str) -> str:
+    """Access token for a user, reusing one issued recently"""
+    token = _issued_token_cache.get(user_id)
+    if token is None:
+        token = create_access_token({"sub": username, "uid": user_id})
+        _issued_token_cache.set(user_id, token)
+    return token
 
 
 def get_token(token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)) -> str:
     return token.credentials
 
 
-async def verify_token(token: str) -> str:
+def decode_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        # A cached token can still expire before its cache entry does
+        exp = payload.get("exp")
+        if exp is None or exp > datetime.now(timezone.utc).timestamp():
+            return payload
+        _token_cache.delete(key)
+
     try:
         payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            token, _SECRET_KEY, algorithms=_ALGORITHMS, options=_DECODE_OPTIONS
         )
-        username = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication token")
-        return username
-    except JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+    _token_cache.set(key, payload)
+    return payload
+
+
+async def verify_token(token: str) -> str:
+    return decode_token(token)["sub"]
 
 
 async def get_current_user(
     token: str = Depends(get_token), user_service: UserService = Depends()
 ) -> UserBase:
-    username = await verify_token(token)
-    user = await user_service.get_user_by_username(username)
+    payload = decode_token(token)
+    if payload.get("uid") is None:
+        # Tokens issued before the uid claim was added
+        user = await user_service.get_user_by_username(payload["sub"])
+    else:
+        # Served from the user cache on repeat requests
+        user = await user_service.get_user_by_id(payload["uid"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
+async def get_current_user_claims(
+    token: str = Depends(get_token), user_service: UserService = Depends()
+) -> CurrentUserClaims:
+    """Current user id and username, read from the token without a user lookup"""
+    payload = decode_token(token)
+    if payload.get("uid") is None:
+        # Tokens issued before the uid claim was added
+        user = await user_service.get_user_by_username(payload["sub"])
+        return CurrentUserClaims(id=user.id, username=user.username)
+    return CurrentUserClaims(id=payload["uid"], username=payload["sub"])
+
+
 # Admin middleware
 async def get_current_admin(
     user: UserBase = Depends(get_current_user),
@@ -1,5 +1,5 @@
-from fastapi import Path, HTTPException
-from typing import Annotated
+from fastapi import Path, HTTPException, Query
+from typing import Annotated, Optional
 
 
 # Create reusable parameter type
@@ -14,3 +14,17 @@ ObjectIdParam = Annotated[
         pattern="^[0-9a-fA-F]{24}$",
     ),
 ]
+
+CursorQuery = Annotated[
+    Optional[str],
+    Query(
+        title="Cursor",
+        description=(
+            "next_cursor of the previous page, to page by cursor instead of by"
+            " page number; preferred for deep pages"
+        ),
+        min_length=24,
+        max_length=24,
+        pattern="^[0-9a-fA-F]{24}$",
+    ),
+]
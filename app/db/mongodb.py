@@ -1,25 +1,54 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from app.core.config import settings
 
 
 class MongoDB:
     client: AsyncIOMotorClient = None
+    # Database handle built once per client instead of on every request
+    db: AsyncIOMotorDatabase = None
+
+    @classmethod
+    def create_client(cls) -> AsyncIOMotorClient:
+        return AsyncIOMotorClient(
+            settings.MONGODB_URL,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            compressors=settings.MONGODB_COMPRESSORS,
+            # Read datetimes back as UTC aware, like the ones the app writes
+            tz_aware=True,
+        )
 
     @classmethod
     def get_client(cls) -> AsyncIOMotorClient:
         if cls.client is None:
-            cls.client = AsyncIOMotorClient(settings.MONGODB_URL)
+            cls.client = cls.create_client()
+            cls.db = None
         return cls.client
 
     @classmethod
-    def get_db(cls):
-        return cls.client[settings.DB_NAME]
+    def get_db(cls) -> AsyncIOMotorDatabase:
+        if cls.db is None:
+            cls.db = cls.get_client()[settings.DB_NAME]
+        return cls.db
 
     @classmethod
     async def connect_db(cls):
-        cls.client = AsyncIOMotorClient(settings.MONGODB_URL)
+        cls.client = cls.create_client()
+        cls.db = cls.client[settings.DB_NAME]
         try:
-            await cls.client.admin.command("ping")
+            # Concurrent pings each check out a connection, so the pool is
+            # warm up to its minimum size before the first request
+            await asyncio.gather(
+                *(
+                    cls.client.admin.command("ping")
+                    for _ in range(max(settings.MONGODB_MIN_POOL_SIZE, 1))
+                )
+            )
             print("Successfully connected to MongoDB")
         except Exception as e:
             print(f"Could not connect to MongoDB: {e}")
@@ -29,3 +58,5 @@ class MongoDB:
     async def close_db(cls):
         if cls.client is not None:
             cls.client.close()
+        cls.client = None
+        cls.db = None
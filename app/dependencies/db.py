@@ -0,0 +1,10 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from app.db.mongodb import MongoDB
+
+
+async def get_db() -> AsyncIOMotorDatabase:
+    return MongoDB.get_db()
+
+
+async def get_client() -> AsyncIOMotorClient:
+    return MongoDB.get_client()
@@ -36,8 +36,7 @@ class CartUpsert(BaseModel):
 
     @field_validator("items")
     def validate_unique_product_ids(cls, items):
-        product_ids = [item.product_id for item in items]
-        if len(product_ids) != len(set(product_ids)):
+        if len({item.product_id for item in items}) != len(items):
             raise ValueError("Duplicate product_id found in cart items")
         return items
 
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class ImageUploadRequest(BaseModel):
+    filename: str = Field(..., min_length=1)
+    content_type: str
+    size: int = Field(..., gt=0)  # Size in bytes
+
+
+class PresignedUpload(BaseModel):
+    url: str  # S3 endpoint to POST the form to
+    fields: Dict[str, str]  # Form fields to send before the file
+    file_url: str  # Public URL of the file once uploaded
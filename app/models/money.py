@@ -0,0 +1,15 @@
+from bson.decimal128 import Decimal128
+from decimal import Decimal
+
+
+CENTS = Decimal("0.01")
+
+
+def to_cents(v) -> Decimal:
+    """Convert a Decimal128, Decimal or number to a Decimal with two places"""
+    # Convert Decimal128 and Decimal directly, without a string round trip
+    if isinstance(v, Decimal128):
+        return v.to_decimal().quantize(CENTS)
+    if isinstance(v, Decimal):
+        return v.quantize(CENTS)
+    return Decimal(str(v)).quantize(CENTS)
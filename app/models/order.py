@@ -3,7 +3,7 @@ from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from decimal import Decimal
 from enum import Enum
-from bson import Decimal128
+from app.models.money import CENTS, to_cents
 
 
 class OrderStatus(str, Enum):
@@ -34,10 +34,7 @@ class OrderItemBase(BaseModel):
 
     @field_validator("price", mode="before")
     def validate_price(cls, v):
-        # Convert Decimal128 to string before validation
-        if isinstance(v, Decimal128):
-            v = str(v)
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return to_cents(v)
 
 
 class OrderBase(BaseModel):
@@ -61,10 +58,7 @@ class OrderBase(BaseModel):
 
     @field_validator("total_amount", mode="before")
     def validate_price(cls, v):
-        # Convert Decimal128 to string before validation
-        if isinstance(v, Decimal128):
-            v = str(v)
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return to_cents(v)
 
 
 class OrderItemCreate(BaseModel):
@@ -83,8 +77,7 @@ class OrderCreate(BaseModel):
 
     @field_validator("items")
     def validate_unique_products(cls, items):
-        product_ids = [item.product_id for item in items]
-        if len(product_ids) != len(set(product_ids)):
+        if len({item.product_id for item in items}) != len(items):
             raise ValueError("Duplicate products in order")
         return items
 
@@ -114,7 +107,7 @@ class OrderSummary(BaseModel):
     @field_validator("total_amount")
     def validate_total(cls, v):
         if v is not None:
-            return Decimal(str(v)).quantize(Decimal("0.01"))
+            return v.quantize(CENTS)
         return v
 
 
@@ -129,5 +122,5 @@ class OrderStats(BaseModel):
     @field_validator("total_amount", "average_order_amount")
     def validate_amounts(cls, v):
         if v is not None:
-            return Decimal(str(v)).quantize(Decimal("0.01"))
+            return v.quantize(CENTS)
         return v
@@ -4,6 +4,7 @@ from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
+from app.models.money import CENTS, to_cents
 
 
 class ProductStatus(str, Enum):
@@ -28,7 +29,7 @@ class ProductCreate(BaseModel):
 
     @field_validator("price")
     def validate_price(cls, v):
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return v.quantize(CENTS)
 
     @field_validator("images")
     def validate_images(cls, v):
@@ -41,10 +42,23 @@ class ProductCreate(BaseModel):
         return Decimal128(str(price))
 
 
-class ProductBase(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+class ProductDocument(BaseModel):
+    """Base of the product models validated from stored documents"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, populate_by_name=True)
+
+    @field_validator("id", mode="before", check_fields=False)
+    def validate_id(cls, v):
+        # Documents are validated with their ObjectId _id as is
+        return str(v)
+
+    @field_validator("price", mode="before", check_fields=False)
+    def validate_price(cls, v):
+        return to_cents(v)
+
 
-    id: str
+class ProductBase(ProductDocument):
+    id: str = Field(validation_alias="_id")
     name: str
     description: str
     price: Decimal
@@ -58,12 +72,13 @@ class ProductBase(BaseModel):
     updated_at: Optional[datetime] = None
     deleted_at: Optional[datetime] = None
 
-    @field_validator("price", mode="before")
-    def validate_price(cls, v):
-        # Convert Decimal128 to string before validation
-        if isinstance(v, Decimal128):
-            v = str(v)
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+
+class ProductSummary(ProductDocument):
+    id: str = Field(validation_alias="_id")
+    name: str
+    price: Decimal
+    stock: int
+    images: List[str] = Field(default=[])  # Only the first image is fetched
 
 
 class ProductUpdate(BaseModel):
@@ -82,7 +97,7 @@ class ProductUpdate(BaseModel):
     @field_validator("price")
     def validate_price(cls, v):
         if v is not None:
-            return Decimal(str(v)).quantize(Decimal("0.01"))
+            return v.quantize(CENTS)
         return v
 
     @field_validator("images")
@@ -2,8 +2,8 @@ from pydantic import BaseModel, Field, ConfigDict, field_validator, field_serial
 from datetime import datetime
 from typing import Optional
 from decimal import Decimal
-from bson.decimal128 import Decimal128
 from enum import Enum
+from app.models.money import CENTS, to_cents
 
 
 class TransactionType(str, Enum):
@@ -36,9 +36,7 @@ class TransactionBase(BaseModel):
 
     @field_validator("amount", "balance", mode="before")
     def validate_decimal(cls, v):
-        if isinstance(v, Decimal128):
-            v = str(v)
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return to_cents(v)
 
 
 class TransactionCreate(BaseModel):
@@ -51,7 +49,7 @@ class TransactionCreate(BaseModel):
 
     @field_validator("amount")
     def validate_amount(cls, v):
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return v.quantize(CENTS)
 
 
 class TransactionDeposit(BaseModel):
@@ -62,7 +60,7 @@ class TransactionDeposit(BaseModel):
 
     @field_validator("amount")
     def validate_amount(cls, v):
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return v.quantize(CENTS)
 
 
 class TransactionWithdraw(BaseModel):
@@ -73,4 +71,4 @@ class TransactionWithdraw(BaseModel):
 
     @field_validator("amount")
     def validate_amount(cls, v):
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return v.quantize(CENTS)
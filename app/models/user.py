@@ -11,6 +11,8 @@ from typing import Optional
 from enum import Enum
 from decimal import Decimal
 from bson.decimal128 import Decimal128
+from app.core.config import settings
+from app.models.money import CENTS, to_cents
 
 
 class UserRole(str, Enum):
@@ -35,9 +37,7 @@ class UserBase(BaseModel):
 
     @field_validator("balance", mode="before")
     def validate_balance(cls, v):
-        if isinstance(v, Decimal128):
-            v = str(v)
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return to_cents(v)
 
 
 class UserCreate(BaseModel):
@@ -56,8 +56,19 @@ class UserCreateByGoogle(BaseModel):
     avatar: Optional[str] = None
 
 
+class CurrentUserClaims(BaseModel):
+    id: str
+    username: str
+
+
+class UserCredentials(BaseModel):
+    id: str
+    username: str
+    password: Optional[str] = None
+
+
 class UserResponse(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    model_config = ConfigDict(arbitrary_types_allowed=True, from_attributes=True)
 
     id: str
     username: str
@@ -72,9 +83,7 @@ class UserResponse(BaseModel):
 
     @field_validator("balance", mode="before")
     def validate_balance(cls, v):
-        if isinstance(v, Decimal128):
-            v = str(v)
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return to_cents(v)
 
 
 class UserLogin(BaseModel):
@@ -94,6 +103,13 @@ class UserUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=2)
     avatar: Optional[str] = None
 
+    @field_validator("avatar")
+    def validate_avatar(cls, v):
+        # An empty string clears the avatar, anything else must be one of ours
+        if v and not v.startswith(settings.AWS_BUCKET_URL):
+            raise ValueError("Invalid avatar URL")
+        return v
+
 
 class UserUpdateByAdmin(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -103,7 +119,7 @@ class UserUpdateByAdmin(BaseModel):
     @field_validator("balance")
     def validate_balance(cls, v):
         if v is not None:
-            return Decimal(str(v)).quantize(Decimal("0.01"))
+            return v.quantize(CENTS)
         return v
 
     @field_serializer("balance")
@@ -16,9 +16,70 @@ MIGRATIONS = [
     "20250113_002_create_transactions.CreateTransactionsMigration",
     "20250119_001_add_order_indexes.AddOrderIndexesMigration",
     "20250130_001_add_user_google_id.AddUserGoogleIdMigration",
+    "20261016_001_add_list_indexes.AddListIndexesMigration",
+    "20261016_002_add_user_text_index.AddUserTextIndexMigration",
+    "20261016_003_add_product_status_created_index.AddProductStatusCreatedIndexMigration",
+    "20261016_004_add_order_list_indexes.AddOrderListIndexesMigration",
+    "20261016_005_add_transaction_cursor_index.AddTransactionCursorIndexMigration",
+    "20261016_006_add_transaction_list_indexes.AddTransactionListIndexesMigration",
+    "20261016_007_add_order_cursor_index.AddOrderCursorIndexMigration",
 ]
 
 
+def load_migration(migration_path: str):
+    """Import a migration class from its path in MIGRATIONS"""
+    module_path, class_name = migration_path.rsplit(".", 1)
+    module = importlib.import_module(f"app.scripts.migrations.{module_path}")
+    return getattr(module, class_name)
+
+
+def group_migrations(migrations: list) -> list:
+    """Split migrations, in order, into cohorts that can run concurrently
+
+    A migration joins the current cohort when everything it depends on ran in
+    an earlier cohort, otherwise it starts the next one
+    """
+    cohorts, done, current = [], set(), []
+    for migration_class in migrations:
+        if migration_class.dependencies is None:
+            ready = not current
+        else:
+            ready = set(migration_class.dependencies) <= done
+        if not ready:
+            cohorts.append(current)
+            done.update(m.version for m in current)
+            current = []
+        current.append(migration_class)
+    if current:
+        cohorts.append(current)
+    return cohorts
+
+
+async def run_migration(db, migration_class):
+    # Check if migration has been run
+    if await db.migrations.find_one({"version": migration_class.version}):
+        print(f"Skipping migration {migration_class.version} (already executed)")
+        return
+
+    print(f"Running migration {migration_class.version}: {migration_class.description}")
+    try:
+        # Run migration
+        await migration_class.up(db)
+
+        # Record successful migration
+        await db.migrations.insert_one(
+            {
+                "version": migration_class.version,
+                "description": migration_class.description,
+                "executed_at": datetime.now(timezone.utc),
+            }
+        )
+        print(f"Completed migration {migration_class.version}")
+    except Exception as e:
+        print(f"Error in migration {migration_class.version}: {str(e)}")
+        raise e
+
+
 async def run_migrations():
     try:
         await MongoDB.connect_db()
@@ -29,38 +90,12 @@ async def run_migrations():
             await db.create_collection("migrations")
             await db.migrations.create_index("version", unique=True)
 
-        for migration_path in MIGRATIONS:
-            # Import migration class
-            module_path, class_name = migration_path.rsplit(".", 1)
-            module = importlib.import_module(f"app.scripts.migrations.{module_path}")
-            migration_class = getattr(module, class_name)
-
-            # Check if migration has been run
-            if not await db.migrations.find_one({"version": migration_class.version}):
-                print(
-                    f"Running migration {migration_class.version}: {migration_class.description}"
-                )
-
-                try:
-                    # Run migration
-                    await migration_class.up(db)
-
-                    # Record successful migration
-                    await db.migrations.insert_one(
-                        {
-                            "version": migration_class.version,
-                            "description": migration_class.description,
-                            "executed_at": datetime.now(timezone.utc),
-                        }
-                    )
-                    print(f"Completed migration {migration_class.version}")
-                except Exception as e:
-                    print(f"Error in migration {migration_class.version}: {str(e)}")
-                    raise e
-            else:
-                print(
-                    f"Skipping migration {migration_class.version} (already executed)"
-                )
+        migrations = [load_migration(path) for path in MIGRATIONS]
+        for cohort in group_migrations(migrations):
+            # Migrations in a cohort don't depend on each other
+            await asyncio.gather(
+                *(run_migration(db, migration_class) for migration_class in cohort)
+            )
 
     except Exception as e:
         print(f"Migration error: {str(e)}")
@@ -1,3 +1,4 @@
+from pymongo import IndexModel
 from .base import Migration
 from datetime import datetime
 
@@ -9,8 +10,12 @@ class AddUserIndexesMigration(Migration):
     @classmethod
     async def up(cls, db):
         # Create indexes
-        await db.users.create_index("username", unique=True)
-        await db.users.create_index("email", unique=True)
+        await db.users.create_indexes(
+            [
+                IndexModel("username", unique=True),
+                IndexModel("email", unique=True),
+            ]
+        )
 
     @classmethod
     async def down(cls, db):
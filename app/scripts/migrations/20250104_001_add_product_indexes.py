@@ -1,3 +1,4 @@
+from pymongo import IndexModel
 from .base import Migration
 
 
@@ -8,8 +9,9 @@ class AddProductIndexesMigration(Migration):
     @classmethod
     async def up(cls, db):
         # Create indexes
-        await db.products.create_index("sku", unique=True)
-        await db.products.create_index("name")
+        await db.products.create_indexes(
+            [IndexModel("sku", unique=True), IndexModel("name")]
+        )
 
     @classmethod
     async def down(cls, db):
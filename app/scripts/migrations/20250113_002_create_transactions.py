@@ -1,3 +1,4 @@
+from pymongo import IndexModel
 from .base import Migration
 
 
@@ -11,11 +12,15 @@ class CreateTransactionsMigration(Migration):
         Create transactions collection and indexes
         """
         # Create indexes
-        await db.transactions.create_index("user_id")
-        await db.transactions.create_index("created_at")
-        await db.transactions.create_index([("user_id", 1), ("created_at", -1)])
-        await db.transactions.create_index("reference_id")
-        await db.transactions.create_index([("user_id", 1), ("type", 1), ("status", 1)])
+        await db.transactions.create_indexes(
+            [
+                IndexModel("user_id"),
+                IndexModel("created_at"),
+                IndexModel([("user_id", 1), ("created_at", -1)]),
+                IndexModel("reference_id"),
+                IndexModel([("user_id", 1), ("type", 1), ("status", 1)]),
+            ]
+        )
 
     @classmethod
     async def down(cls, db):
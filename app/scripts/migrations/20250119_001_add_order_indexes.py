@@ -1,3 +1,4 @@
+from pymongo import IndexModel
 from .base import Migration
 
 
@@ -11,12 +12,14 @@ class AddOrderIndexesMigration(Migration):
         Add order indexes
         """
         # Create indexes
-        await db.orders.create_index("user_id")
-        await db.orders.create_index("created_at")
-        await db.orders.create_index("status")
-        await db.orders.create_index("payment_status")
-        await db.orders.create_index(
-            [("user_id", 1), ("status", 1), ("created_at", -1)]
+        await db.orders.create_indexes(
+            [
+                IndexModel("user_id"),
+                IndexModel("created_at"),
+                IndexModel("status"),
+                IndexModel("payment_status"),
+                IndexModel([("user_id", 1), ("status", 1), ("created_at", -1)]),
+            ]
         )
 
     @classmethod
@@ -0,0 +1,44 @@
+from pymongo import IndexModel
+from .base import Migration
+
+
+class AddListIndexesMigration(Migration):
+    version = "20261016_001_add_list_indexes"
+    description = "Add compound and text indexes for product and user lists"
+    dependencies = []
+
+    @classmethod
+    async def up(cls, db):
+        """
+        Add indexes matching the product and user list filters and default sort
+        """
+        await db.products.create_indexes(
+            [
+                IndexModel(
+                    [
+                        ("deleted_at", 1),
+                        ("status", 1),
+                        ("category", 1),
+                        ("created_at", -1),
+                    ],
+                    name="deleted_status_category_created",
+                ),
+                IndexModel(
+                    [("name", "text"), ("description", "text")],
+                    name="text_search_idx",
+                ),
+            ]
+        )
+        await db.users.create_index(
+            [("deleted_at", 1), ("role", 1), ("created_at", -1)],
+            name="deleted_role_created",
+        )
+
+    @classmethod
+    async def down(cls, db):
+        """
+        Drop product and user list indexes
+        """
+        await db.products.drop_index("deleted_status_category_created")
+        await db.products.drop_index("text_search_idx")
+        await db.users.drop_index("deleted_role_created")
@@ -0,0 +1,24 @@
+from .base import Migration
+
+
+class AddUserTextIndexMigration(Migration):
+    version = "20261016_002_add_user_text_index"
+    description = "Add text index for user search"
+    dependencies = []
+
+    @classmethod
+    async def up(cls, db):
+        """
+        Add text index on the fields searched in the admin user list
+        """
+        await db.users.create_index(
+            [("username", "text"), ("email", "text"), ("name", "text")],
+            name="text_search_idx",
+        )
+
+    @classmethod
+    async def down(cls, db):
+        """
+        Drop user text index
+        """
+        await db.users.drop_index("text_search_idx")
@@ -0,0 +1,24 @@
+from .base import Migration
+
+
+class AddProductStatusCreatedIndexMigration(Migration):
+    version = "20261016_003_add_product_status_created_index"
+    description = "Add index for product lists without a category filter"
+    dependencies = []
+
+    @classmethod
+    async def up(cls, db):
+        """
+        Add index serving the default created_at sort across all categories
+        """
+        await db.products.create_index(
+            [("deleted_at", 1), ("status", 1), ("created_at", -1)],
+            name="deleted_status_created",
+        )
+
+    @classmethod
+    async def down(cls, db):
+        """
+        Drop product status and created_at index
+        """
+        await db.products.drop_index("deleted_status_created")
@@ -0,0 +1,31 @@
+from pymongo import IndexModel
+from .base import Migration
+
+
+class AddOrderListIndexesMigration(Migration):
+    version = "20261016_004_add_order_list_indexes"
+    description = "Add compound indexes for order lists"
+    dependencies = []
+
+    @classmethod
+    async def up(cls, db):
+        """
+        Add indexes for user order lists sorted by created_at
+        """
+        await db.orders.create_indexes(
+            [
+                IndexModel([("user_id", 1), ("created_at", -1)], name="user_created"),
+                IndexModel(
+                    [("user_id", 1), ("payment_status", 1), ("created_at", -1)],
+                    name="user_payment_status_created",
+                ),
+            ]
+        )
+
+    @classmethod
+    async def down(cls, db):
+        """
+        Drop order list indexes
+        """
+        await db.orders.drop_index("user_created")
+        await db.orders.drop_index("user_payment_status_created")
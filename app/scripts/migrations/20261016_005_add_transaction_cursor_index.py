@@ -0,0 +1,23 @@
+from .base import Migration
+
+
+class AddTransactionCursorIndexMigration(Migration):
+    version = "20261016_005_add_transaction_cursor_index"
+    description = "Add index for transaction cursor pagination"
+    dependencies = []
+
+    @classmethod
+    async def up(cls, db):
+        """
+        Add index serving a user's transactions paged by _id
+        """
+        await db.transactions.create_index(
+            [("user_id", 1), ("_id", -1)], name="user_id_cursor"
+        )
+
+    @classmethod
+    async def down(cls, db):
+        """
+        Drop transaction cursor index
+        """
+        await db.transactions.drop_index("user_id_cursor")
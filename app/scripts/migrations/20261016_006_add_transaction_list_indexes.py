@@ -0,0 +1,38 @@
+from pymongo import IndexModel
+from .base import Migration
+
+
+class AddTransactionListIndexesMigration(Migration):
+    version = "20261016_006_add_transaction_list_indexes"
+    description = "Add compound indexes for transaction lists"
+    dependencies = []
+
+    @classmethod
+    async def up(cls, db):
+        """
+        Add indexes for transaction history filters and sorts
+        """
+        await db.transactions.create_indexes(
+            [
+                IndexModel(
+                    [("user_id", 1), ("type", 1), ("created_at", -1)],
+                    name="user_type_created",
+                ),
+                IndexModel(
+                    [("user_id", 1), ("status", 1), ("created_at", -1)],
+                    name="user_status_created",
+                ),
+                IndexModel(
+                    [("user_id", 1), ("amount", 1), ("_id", 1)], name="user_amount"
+                ),
+            ]
+        )
+
+    @classmethod
+    async def down(cls, db):
+        """
+        Drop transaction list indexes
+        """
+        await db.transactions.drop_index("user_type_created")
+        await db.transactions.drop_index("user_status_created")
+        await db.transactions.drop_index("user_amount")
@@ -0,0 +1,23 @@
+from .base import Migration
+
+
+class AddOrderCursorIndexMigration(Migration):
+    version = "20261016_007_add_order_cursor_index"
+    description = "Add index for order cursor pagination"
+    dependencies = []
+
+    @classmethod
+    async def up(cls, db):
+        """
+        Add index serving a user's orders paged by _id
+        """
+        await db.orders.create_index(
+            [("user_id", 1), ("_id", -1)], name="user_id_cursor"
+        )
+
+    @classmethod
+    async def down(cls, db):
+        """
+        Drop order cursor index
+        """
+        await db.orders.drop_index("user_id_cursor")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 
 class Migration:
@@ -7,6 +7,9 @@ class Migration:
 
     version: str
     description: str
+    # Versions that must run first. None waits for every earlier migration,
+    # a list lets the migration run alongside others once those are done.
+    dependencies: Optional[List[str]] = None
 
     @classmethod
     async def up(cls, db):
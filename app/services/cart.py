@@ -1,72 +1,94 @@
-from app.models.cart import CartBase, CartUpsert, CartItemResponse, CartResponse
-from app.db.mongodb import MongoDB
-from fastapi import HTTPException
+from app.models.cart import (
+    CartBase,
+    CartItemBase,
+    CartItemUpsert,
+    CartUpsert,
+    CartItemResponse,
+    CartResponse,
+)
+from app.dependencies.db import get_db
+from fastapi import Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timezone
 from bson import ObjectId, Decimal128
+from pymongo import ReturnDocument
 from decimal import Decimal
 from typing import List, Optional
+from pydantic import TypeAdapter
+
+
+_cart_items_adapter = TypeAdapter(List[CartItemUpsert])
+
+
+def _cart_from_doc(doc: dict) -> CartBase:
+    """Build a cart from a stored document without validating it again"""
+    return CartBase.model_construct(
+        user_id=doc["user_id"],
+        items=[CartItemBase.model_construct(**item) for item in doc["items"]],
+        updated_at=doc.get("updated_at"),
+    )
 
 
 class CartService:
-    def __init__(self):
-        self.db = MongoDB.get_db()
+    def __init__(self, db: AsyncIOMotorDatabase = Depends(get_db)):
+        self.db = db
+        # Motor builds a new collection wrapper on every attribute access
+        self.carts = db.carts
+        self.products = db.products
 
     async def get_cart(self, user_id: str) -> CartBase:
         """Get user's cart with product details"""
-        # Get cart or create if doesn't exist
-        cart = await self.db.carts.find_one({"user_id": user_id})
-        if not cart:
-            cart = {
-                "user_id": user_id,
-                "items": [],
-                "updated_at": datetime.now(timezone.utc),
-            }
-            await self.db.carts.insert_one(cart)
+        # Get cart or create if doesn't exist, in a single round trip
+        cart = await self.carts.find_one_and_update(
+            {"user_id": user_id},
+            {"$setOnInsert": {"items": [], "updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
 
-        return CartBase(**cart)
+        return _cart_from_doc(cart)
 
     async def upsert_cart(self, user_id: str, cart_data: CartUpsert) -> CartBase:
         """Update or insert cart items"""
 
         # Update cart
-        cart = await self.db.carts.find_one_and_update(
+        cart = await self.carts.find_one_and_update(
             {"user_id": user_id},
             {
                 "$set": {
-                    "items": [item.model_dump() for item in cart_data.items],
+                    "items": _cart_items_adapter.dump_python(cart_data.items),
                     "updated_at": datetime.now(timezone.utc),
-                }
+                },
+                "$setOnInsert": {"user_id": user_id},
             },
             upsert=True,
-            return_document=True,
+            return_document=ReturnDocument.AFTER,
         )
-        return CartBase(**cart)
+        return _cart_from_doc(cart)
 
     async def clear_cart(self, user_id: str) -> bool:
         """Clear all items from user's cart"""
-        result = await self.db.carts.find_one_and_update(
+        result = await self.carts.find_one_and_update(
             {"user_id": user_id},
             {"$set": {"items": [], "updated_at": datetime.now(timezone.utc)}},
-            return_document=True,
+            return_document=ReturnDocument.AFTER,
         )
         return bool(result)
 
     async def validate_cart(self, user_id: str) -> bool:
         """Validate cart items stock availability"""
-        cart = await self.db.carts.find_one({"user_id": user_id})
+        cart = await self.carts.find_one({"user_id": user_id})
         if not cart or not cart["items"]:
             return True
 
-        product_ids = [ObjectId(item["product_id"]) for item in cart["items"]]
-        async for product in self.db.products.find({"_id": {"$in": product_ids}}):
-            cart_item = next(
-                (
-                    item
-                    for item in cart["items"]
-                    if item["product_id"] == str(product["_id"])
-                ),
-                None,
-            )
+        items_by_id = {item["product_id"]: item for item in cart["items"]}
+        product_ids = [ObjectId(product_id) for product_id in items_by_id]
+        # Only the fields the stock check reads
+        cursor = self.products.find(
+            {"_id": {"$in": product_ids}}, projection={"stock": 1, "name": 1}
+        )
+        for product in await cursor.to_list(length=len(product_ids)):
+            cart_item = items_by_id.get(str(product["_id"]))
             if cart_item and product["stock"] < cart_item["quantity"]:
                 raise HTTPException(
                     status_code=400,
@@ -1,5 +1,7 @@
+from app.models.money import to_cents
 from app.models.order import (
     OrderBase,
+    OrderItemBase,
     OrderCreate,
     OrderUpdate,
     OrderAdminUpdate,
@@ -8,20 +10,41 @@ from app.models.order import (
     OrderSummary,
     OrderStats,
 )
-from app.db.mongodb import MongoDB
-from fastapi import HTTPException
+from app.dependencies.db import get_db
+from app.utils.dates import utc_now
+from app.utils.pagination import find_page, seek_after
+from fastapi import Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
 from datetime import datetime, timezone
 from bson import ObjectId, Decimal128
 from decimal import Decimal
 from typing import List, Optional, Tuple
-from math import ceil
 
 from app.models.product import ProductBase, ProductStatus
 
 
+def _order_from_doc(doc: dict) -> OrderBase:
+    """Build an order from a stored document without validating it again
+
+    Orders are only written by this service, so only the values Mongo stores
+    as other types are converted
+    """
+    doc["id"] = str(doc.pop("_id"))
+    doc["total_amount"] = to_cents(doc["total_amount"])
+    doc["status"] = OrderStatus(doc["status"])
+    doc["payment_status"] = PaymentStatus(doc["payment_status"])
+    doc["items"] = [
+        OrderItemBase.model_construct(**{**item, "price": to_cents(item["price"])})
+        for item in doc["items"]
+    ]
+    return OrderBase.model_construct(**doc)
+
+
 class OrderService:
-    def __init__(self):
-        self.db = MongoDB.get_db()
+    def __init__(self, db: AsyncIOMotorDatabase = Depends(get_db)):
+        self.db = db
+        # Motor builds a new collection wrapper on every attribute access
+        self.orders = db.orders
 
     async def create_order(
         self, user_id: str, order_data: OrderCreate, products: List[ProductBase]
@@ -32,7 +55,9 @@ class OrderService:
         # Create product lookup dict
         product_map = {str(p.id): p for p in products}
 
-        # Validate all products and update order items with current prices
+        # Validate all products, update order items with current prices and
+        # total them in the same pass
+        total_amount = Decimal("0")
         for item in order_dict["items"]:
             product = product_map.get(item["product_id"])
             if not product or product.status != ProductStatus.ACTIVE:
@@ -45,24 +70,19 @@ class OrderService:
                     detail=f"Insufficient stock for product: {product.name}",
                 )
             # Update item with current product data
-            item["price"] = Decimal128(str(product.price))
+            item["price"] = Decimal128(product.price)
             item["name"] = product.name
             item["image"] = product.images[0] if product.images else None
-
-        # Calculate total amount
-        total_amount = sum(
-            Decimal(str(item["price"])) * item["quantity"]
-            for item in order_dict["items"]
-        )
+            total_amount += product.price * item["quantity"]
 
         # Prepare order document
         order_dict.update(
             {
                 "user_id": user_id,
-                "total_amount": Decimal128(str(total_amount)),
+                "total_amount": Decimal128(total_amount),
                 "status": OrderStatus.PENDING,
                 "payment_status": PaymentStatus.PENDING,
-                "created_at": datetime.now(timezone.utc),
+                "created_at": utc_now(),
                 "updated_at": None,
                 "cancelled_at": None,
                 "shipped_at": None,
@@ -71,12 +91,11 @@ class OrderService:
             }
         )
 
-        # Insert order
-        result = await self.db.orders.insert_one(order_dict)
-        created_order = await self.db.orders.find_one({"_id": result.inserted_id})
-        created_order["id"] = str(created_order.pop("_id"))
+        # Insert order, insert_one adds the generated _id to order_dict, which
+        # then holds everything that was stored
+        await self.orders.insert_one(order_dict)
 
-        return OrderBase.model_validate(created_order)
+        return _order_from_doc(order_dict)
 
     async def get_order_by_id(
         self, order_id: str, user_id: Optional[str] = None
@@ -86,12 +105,11 @@ class OrderService:
         if user_id:  # If user_id provided, ensure order belongs to user
             query["user_id"] = user_id
 
-        order = await self.db.orders.find_one(query)
+        order = await self.orders.find_one(query)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
 
-        order["id"] = str(order.pop("_id"))
-        return OrderBase.model_validate(order)
+        return _order_from_doc(order)
 
     async def get_orders(
         self,
@@ -102,9 +120,16 @@ class OrderService:
         payment_status: Optional[PaymentStatus] = None,
         sort_by: Optional[str] = "created_at",
         sort_order: Optional[str] = "desc",
-    ) -> Tuple[List[OrderBase], int]:
-        """Get orders with pagination and filtering"""
-        # Build query
+        after_id: Optional[str] = None,
+    ) -> Tuple[List[OrderBase], Optional[int]]:
+        """Get orders with pagination and filtering
+
+        When after_id is given, orders are paged by _id after that cursor, see
+        seek_after. The total is None when paging by cursor
+        """
+        # Build query, served by the (user_id, [status | payment_status],
+        # created_at) indexes for the default sort and by the (user_id, _id)
+        # index when paging by cursor
         query = {}
         if user_id:
             query["user_id"] = user_id
@@ -117,20 +142,20 @@ class OrderService:
         sort_field = sort_by if sort_by else "created_at"
         sort_direction = -1 if sort_order == "desc" else 1
 
-        # Get total count
-        total = await self.db.orders.count_documents(query)
-
-        # Get orders
-        cursor = self.db.orders.find(query)
-        cursor = cursor.sort(sort_field, sort_direction)
-        cursor = cursor.skip(skip).limit(limit)
-
-        orders = []
-        async for doc in cursor:
-            doc["id"] = str(doc.pop("_id"))
-            orders.append(OrderBase.model_validate(doc))
+        if after_id:
+            seek_after(query, after_id, sort_direction)
+            sort_field, skip = "_id", 0
+
+        docs, total = await find_page(
+            self.orders,
+            query,
+            [(sort_field, sort_direction)],
+            skip,
+            limit,
+            include_total=not after_id,
+        )
 
-        return orders, total
+        return [_order_from_doc(doc) for doc in docs], total
 
     async def update_order(
         self,
@@ -139,15 +164,10 @@ class OrderService:
         user_id: Optional[str] = None,
     ) -> OrderBase:
         """Update order"""
-        # Get existing order
         query = {"_id": ObjectId(order_id)}
         if user_id:  # If user_id provided, ensure order belongs to user
             query["user_id"] = user_id
 
-        order = await self.db.orders.find_one(query)
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-
         # Prepare update data
         update_data = order_data.model_dump(exclude_unset=True)
         if not update_data:
@@ -163,77 +183,66 @@ class OrderService:
             elif update_data["status"] == OrderStatus.DELIVERED:
                 update_data["delivered_at"] = datetime.now(timezone.utc)
 
-        # Update order
-        updated_order = await self.db.orders.find_one_and_update(
+        # Update order, a missing order (or one of another user) matches nothing
+        updated_order = await self.orders.find_one_and_update(
             query, {"$set": update_data}, return_document=True
         )
 
         if not updated_order:
             raise HTTPException(status_code=404, detail="Order not found")
 
-        updated_order["id"] = str(updated_order.pop("_id"))
-        return OrderBase.model_validate(updated_order)
+        return _order_from_doc(updated_order)
 
     async def get_order_stats(self, user_id: Optional[str] = None) -> OrderStats:
         """Get order statistics"""
-        match_stage = {} if user_id is None else {"$match": {"user_id": user_id}}
-
-        pipeline = [
-            match_stage,
+        # Group by status so each order is bucketed once, then fold the few
+        # status groups together here
+        pipeline = [{"$match": {"user_id": user_id}}] if user_id else []
+        pipeline.append(
             {
                 "$group": {
-                    "_id": None,
-                    "total_orders": {"$sum": 1},
-                    "total_amount": {"$sum": "$total_amount"},
-                    "pending_orders": {
-                        "$sum": {
-                            "$cond": [{"$eq": ["$status", OrderStatus.PENDING]}, 1, 0]
-                        }
-                    },
-                    "completed_orders": {
-                        "$sum": {
-                            "$cond": [{"$eq": ["$status", OrderStatus.DELIVERED]}, 1, 0]
-                        }
-                    },
-                    "cancelled_orders": {
-                        "$sum": {
-                            "$cond": [{"$eq": ["$status", OrderStatus.CANCELLED]}, 1, 0]
-                        }
-                    },
+                    "_id": "$status",
+                    "count": {"$sum": 1},
+                    "amount": {"$sum": "$total_amount"},
                 }
-            },
-        ]
-
-        result = await self.db.orders.aggregate(pipeline).to_list(1)
-        if not result:
-            return OrderStats(
-                total_orders=0,
-                total_amount=Decimal("0"),
-                pending_orders=0,
-                completed_orders=0,
-                cancelled_orders=0,
-                average_order_amount=Decimal("0"),
-            )
+            }
+        )
 
-        stats = result[0]
-        total_orders = stats["total_orders"]
-        total_amount = Decimal(str(stats["total_amount"]))
+        groups = await self.orders.aggregate(pipeline).to_list(None)
+        counts = {group["_id"]: group["count"] for group in groups}
+        total_orders = sum(counts.values())
+        total_amount = sum(
+            (group["amount"].to_decimal() for group in groups), Decimal("0")
+        )
 
         return OrderStats(
             total_orders=total_orders,
             total_amount=total_amount,
-            pending_orders=stats["pending_orders"],
-            completed_orders=stats["completed_orders"],
-            cancelled_orders=stats["cancelled_orders"],
+            pending_orders=counts.get(OrderStatus.PENDING.value, 0),
+            completed_orders=counts.get(OrderStatus.DELIVERED.value, 0),
+            cancelled_orders=counts.get(OrderStatus.CANCELLED.value, 0),
             average_order_amount=(
                 total_amount / total_orders if total_orders > 0 else Decimal("0")
             ),
         )
 
     async def update_order_payment_status(
-        self, order_id: str, payment_status: PaymentStatus, transaction_id: str = None
+        self,
+        order_id: str,
+        payment_status: PaymentStatus,
+        transaction_id: str = None,
+        from_statuses: Optional[List[PaymentStatus]] = None,
+        session: Optional[AsyncIOMotorClientSession] = None,
     ) -> None:
-        """Update order payment status"""
+        """Update order payment status
+
+        When from_statuses is given, only an order currently in one of those
+        payment statuses is updated
+        """
+        query = {"_id": ObjectId(order_id)}
+        if from_statuses:
+            query["payment_status"] = {"$in": from_statuses}
+
         update_data = {
             "payment_status": payment_status,
             "updated_at": datetime.now(timezone.utc),
@@ -241,9 +250,8 @@ class OrderService:
         if transaction_id:
             update_data["transaction_id"] = transaction_id
 
-        result = await self.db.orders.update_one(
-            {"_id": ObjectId(order_id)},
-            {"$set": update_data},
+        result = await self.orders.update_one(
+            query, {"$set": update_data}, session=session
         )
 
         if result.modified_count == 0:
@@ -251,9 +259,14 @@ class OrderService:
                 status_code=400, detail="Failed to update payment status"
             )
 
-    async def update_order_status(self, order_id: str, status: OrderStatus) -> None:
+    async def update_order_status(
+        self,
+        order_id: str,
+        status: OrderStatus,
+        session: Optional[AsyncIOMotorClientSession] = None,
+    ) -> None:
         """Update order status"""
-        result = await self.db.orders.update_one(
+        result = await self.orders.update_one(
             {"_id": ObjectId(order_id)},
             {
                 "$set": {
@@ -261,6 +274,7 @@ class OrderService:
                     "updated_at": datetime.now(timezone.utc),
                 }
             },
+            session=session,
         )
 
         if result.modified_count == 0:
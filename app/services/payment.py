@@ -0,0 +1,93 @@
+from app.models.order import OrderBase, OrderStatus, PaymentStatus
+from app.models.transaction import TransactionBase, TransactionCreate, TransactionType
+from app.dependencies.db import get_client
+from app.services.order import OrderService
+from app.services.product import ProductService
+from app.services.transaction import TransactionService
+from app.services.user import UserService
+from fastapi import Depends
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+
+
+class PaymentService:
+    def __init__(
+        self,
+        client: AsyncIOMotorClient = Depends(get_client),
+        user_service: UserService = Depends(),
+        transaction_service: TransactionService = Depends(),
+        order_service: OrderService = Depends(),
+        product_service: ProductService = Depends(),
+    ):
+        self.client = client
+        self.user_service = user_service
+        self.transaction_service = transaction_service
+        self.order_service = order_service
+        self.product_service = product_service
+
+    async def pay_order(self, user_id: str, order: OrderBase) -> TransactionBase:
+        """Pay for an order from the user's balance and confirm it
+
+        Every write runs in one transaction, so a failure at any step rolls
+        back the others and a concurrent payment of the same order can't pass
+        the payment status guard
+        """
+        transaction_data = TransactionCreate(
+            type=TransactionType.PAYMENT,
+            amount=order.total_amount,
+            description=f"Payment for order #{order.id}",
+        )
+
+        async def pay(session: AsyncIOMotorClientSession) -> TransactionBase:
+            # Fails with insufficient balance unless the balance covers the
+            # total at the moment of the update
+            balance = await self.user_service.update_balance(
+                user_id=user_id,
+                amount=order.total_amount,
+                operation="subtract",
+                session=session,
+            )
+
+            await self.product_service.update_stock_after_order_payment(
+                order, session=session
+            )
+
+            transaction = await self.transaction_service.create_transaction(
+                transaction_data=transaction_data,
+                user_id=user_id,
+                balance=balance,
+                session=session,
+            )
+
+            await self.order_service.update_order_payment_status(
+                order.id,
+                PaymentStatus.PAID,
+                transaction.id,
+                from_statuses=[PaymentStatus.PENDING, PaymentStatus.FAILED],
+                session=session,
+            )
+
+            await self.order_service.update_order_status(
+                order.id, OrderStatus.CONFIRMED, session=session
+            )
+            return transaction
+
+        # with_transaction retries write conflicts with concurrent payments
+        # touching the same balance or stock, so a retried duplicate checkout
+        # fails the payment status guard instead of erroring
+        async with await self.client.start_session() as session:
+            transaction = await session.with_transaction(
+                pay,
+                read_concern=ReadConcern("snapshot"),
+                write_concern=WriteConcern("majority"),
+            )
+
+        # Evict only once committed, so a read during the transaction can't
+        # cache the values from before the payment
+        self.user_service.evict_cached_user(user_id)
+        self.product_service.evict_cached_products(
+            item.product_id for item in order.items
+        )
+        self.transaction_service.evict_cached_total(user_id)
+        return transaction
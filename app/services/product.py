@@ -1,61 +1,135 @@
 from app.models.order import OrderBase
-from app.models.product import ProductBase, ProductCreate, ProductUpdate, ProductStatus
-from app.db.mongodb import MongoDB
-from fastapi import HTTPException
+from app.models.product import (
+    ProductBase,
+    ProductCreate,
+    ProductSummary,
+    ProductUpdate,
+    ProductStatus,
+)
+from app.dependencies.db import get_db
+from app.utils.cache import TTLCache
+from app.utils.dates import utc_now
+from app.utils.pagination import find_page, seek_after
+from fastapi import Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
 from datetime import datetime, timezone
 from bson import ObjectId, Decimal128
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from decimal import Decimal
-from typing import List, Optional, Tuple
-from math import ceil
+from pydantic import TypeAdapter
+from typing import Iterable, List, Optional, Tuple
+
+
+_product_list_adapter = TypeAdapter(List[ProductBase])
+
+# Only fetch the fields ProductBase reads, not any extra stored fields
+_product_projection = {name: 1 for name in ProductBase.model_fields if name != "id"}
+
+# Product details and categories are read far more often than they change
+_product_cache = TTLCache(ttl=30, maxsize=1024)
+_categories_cache = TTLCache(ttl=300, maxsize=1)
 
 
 class ProductService:
-    def __init__(self):
-        self.db = MongoDB.get_db()
+    def __init__(self, db: AsyncIOMotorDatabase = Depends(get_db)):
+        self.db = db
 
     async def create_product(self, product_data: ProductCreate) -> ProductBase:
         """Create a new product"""
-        # Check existing SKU
-        if await self.db.products.find_one({"sku": product_data.sku}):
-            raise HTTPException(status_code=400, detail="SKU already exists")
-
         # Prepare product data
         product_dict = product_data.model_dump()
         product_dict.update(
             {
-                "created_at": datetime.now(timezone.utc),
+                "created_at": utc_now(),
                 "updated_at": None,
                 "deleted_at": None,
                 "price": Decimal128(str(product_dict["price"])),
             }
         )
 
-        # Insert product
-        result = await self.db.products.insert_one(product_dict)
-        created_product = await self.db.products.find_one({"_id": result.inserted_id})
-        created_product["id"] = str(created_product.pop("_id"))
+        # Insert product; the inserted document, with its _id, is known locally.
+        # SKU uniqueness is enforced by the unique sku index.
+        try:
+            await self.db.products.insert_one(product_dict)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="SKU already exists")
+        _categories_cache.clear()
 
-        return ProductBase.model_validate(created_product)
+        return ProductBase.model_validate(product_dict)
 
     async def get_product_by_id(self, product_id: str) -> ProductBase:
         """Get product by ID"""
-        product = await self.db.products.find_one({"_id": ObjectId(product_id)})
+        # Callers get their own copy, so changes to it never reach the cache
+        cached = _product_cache.get(product_id)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+
+        product = await self.db.products.find_one(
+            {"_id": ObjectId(product_id)}, projection=_product_projection
+        )
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        product["id"] = str(product.pop("_id"))
-        return ProductBase.model_validate(product)
+        product = ProductBase.model_validate(product)
+        _product_cache.set(product_id, product)
+        return product.model_copy(deep=True)
+
+    async def get_products_by_ids(
+        self, product_ids: Iterable[str]
+    ) -> List[ProductBase]:
+        """Get products by IDs, each product is queried once"""
+        object_ids = list({ObjectId(id) for id in product_ids})
+        cursor = self.db.products.find({"_id": {"$in": object_ids}})
+        docs = await cursor.to_list(length=len(object_ids))
+        return _product_list_adapter.validate_python(docs)
+
+    async def get_product_summaries_by_ids(
+        self, product_ids: Iterable[str], active_only: bool = False
+    ) -> List[ProductSummary]:
+        """Get name, price, first image and stock of products by IDs"""
+        object_ids = list({ObjectId(id) for id in product_ids})
+        query = {"_id": {"$in": object_ids}}
+        if active_only:
+            query.update({"status": ProductStatus.ACTIVE, "deleted_at": None})
 
-    async def get_products_by_ids(self, product_ids: List[str]) -> List[ProductBase]:
-        """Get products by IDs"""
         cursor = self.db.products.find(
-            {"_id": {"$in": [ObjectId(id) for id in product_ids]}}
+            query,
+            projection={"name": 1, "price": 1, "images": {"$slice": 1}, "stock": 1},
         )
-        products = []
-        async for doc in cursor:
-            doc["id"] = str(doc.pop("_id"))
-            products.append(ProductBase.model_validate(doc))
-        return products
+        docs = await cursor.to_list(length=len(object_ids))
+        return [ProductSummary.model_validate(doc) for doc in docs]
+
+    async def validate_order_items(self, order: OrderBase) -> None:
+        """Check all order items are active and in stock in one query"""
+        quantities = {item.product_id: item.quantity for item in order.items}
+
+        # Let the server match only items that are active and in stock, and
+        # return just their ids
+        cursor = self.db.products.find(
+            {
+                "$or": [
+                    {"_id": ObjectId(product_id), "stock": {"$gte": quantity}}
+                    for product_id, quantity in quantities.items()
+                ],
+                "status": ProductStatus.ACTIVE,
+                "deleted_at": None,
+            },
+            projection={"_id": 1},
+        )
+        valid_ids = {
+            str(doc["_id"]) for doc in await cursor.to_list(length=len(quantities))
+        }
+
+        # Items that didn't match are not found, not active or short on stock
+        invalid_ids = [
+            product_id for product_id in quantities if product_id not in valid_ids
+        ]
+        if invalid_ids:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Products unavailable or out of stock: {', '.join(invalid_ids)}",
+            )
 
     async def update_product(
         self, product_id: str, product_data: ProductUpdate
@@ -71,14 +145,22 @@ class ProductService:
 
         update_data["updated_at"] = datetime.now(timezone.utc)
 
-        result = await self.db.products.find_one_and_update(
-            {"_id": ObjectId(product_id)}, {"$set": update_data}, return_document=True
-        )
+        # SKU uniqueness is enforced by the unique sku index
+        try:
+            result = await self.db.products.find_one_and_update(
+                {"_id": ObjectId(product_id)},
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="SKU already exists")
 
         if not result:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        result["id"] = str(result.pop("_id"))
+        _product_cache.delete(product_id)
+        _categories_cache.clear()
+
         return ProductBase.model_validate(result)
 
     async def soft_delete_product(self, product_id: str) -> bool:
@@ -93,6 +175,8 @@ class ProductService:
             },
             return_document=True,
         )
+        _product_cache.delete(product_id)
+        _categories_cache.clear()
         return bool(result)
 
     async def get_products(
@@ -106,9 +190,17 @@ class ProductService:
         status: Optional[ProductStatus] = ProductStatus.ACTIVE,
         min_price: Optional[Decimal] = None,
         max_price: Optional[Decimal] = None,
-    ) -> Tuple[List[ProductBase], int]:
-        """Get products with pagination and filtering"""
-        # Build query
+        after_id: Optional[str] = None,
+        include_total: bool = True,
+    ) -> Tuple[List[ProductBase], Optional[int]]:
+        """Get products with pagination and filtering
+
+        When after_id is given, products are paged by _id after that cursor, see
+        seek_after. The total is None when include_total is False or when paging
+        by cursor
+        """
+        # Build query, served by the (deleted_at, status, [category], created_at)
+        # indexes for the default sort and by text_search_idx for searches
         query = {"deleted_at": None}
 
         if status:
@@ -118,10 +210,7 @@ class ProductService:
             query["category"] = category
 
         if search:
-            query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-            ]
+            query["$text"] = {"$search": search}
 
         if min_price is not None or max_price is not None:
             price_query = {}
@@ -137,21 +226,25 @@ class ProductService:
         if sort_field == "id":
             sort_field = "_id"
         sort_direction = -1 if sort_order == "desc" else 1
-
-        # Get total count
-        total = await self.db.products.count_documents(query)
-
-        # Get products
-        cursor = self.db.products.find(query)
-        cursor = cursor.sort(sort_field, sort_direction)
-        cursor = cursor.skip(skip).limit(limit)
-
-        products = []
-        async for doc in cursor:
-            doc["id"] = str(doc.pop("_id"))
-            products.append(ProductBase.model_validate(doc))
-
-        return products, total
+        sort = {sort_field: sort_direction}
+        if search and not sort_by:
+            # Order search results by relevance using the text index ranking
+            sort = {"score": {"$meta": "textScore"}}
+
+        if after_id:
+            seek_after(query, after_id, sort_direction)
+            sort, skip, include_total = {"_id": sort_direction}, 0, False
+
+        docs, total = await find_page(
+            self.db.products,
+            query,
+            sort.items(),
+            skip,
+            limit,
+            include_total=include_total,
+            projection=_product_projection,
+        )
+        return _product_list_adapter.validate_python(docs), total
 
     async def update_stock(
         self, product_id: str, quantity: int, operation: str = "add"
@@ -165,8 +258,13 @@ class ProductService:
 
         # For subtract operation, check if enough stock
         if operation == "subtract":
-            product = await self.get_product_by_id(product_id)
-            if product.stock < quantity:
+            # Read stock from the database, cached products may be stale
+            product = await self.db.products.find_one(
+                {"_id": ObjectId(product_id)}, projection={"stock": 1}
+            )
+            if not product:
+                raise HTTPException(status_code=404, detail="Product not found")
+            if product["stock"] < quantity:
                 raise HTTPException(status_code=400, detail="Insufficient stock")
 
         update_result = await self.db.products.find_one_and_update(
@@ -181,50 +279,56 @@ class ProductService:
         if not update_result:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        update_result["id"] = str(update_result.pop("_id"))
+        _product_cache.delete(product_id)
         return ProductBase.model_validate(update_result)
 
-    async def update_stock_after_order_payment(self, order: OrderBase) -> None:
-        """Update product stock after order payment"""
-        updated_products = []
-        try:
-            # First pass - attempt to update all products
-            for item in order.items:
-                update_result = await self.db.products.find_one_and_update(
+    async def update_stock_after_order_payment(
+        self, order: OrderBase, session: Optional[AsyncIOMotorClientSession] = None
+    ) -> None:
+        """Update product stock after order payment
+
+        Run this in the payment transaction, so that a failure on any item also
+        rolls back the items already updated. With a session, the caller evicts
+        the cached products after the transaction commits, see
+        evict_cached_products
+        """
+        now = datetime.now(timezone.utc)
+        result = await self.db.products.bulk_write(
+            [
+                UpdateOne(
                     {
                         "_id": ObjectId(item.product_id),
+                        "status": ProductStatus.ACTIVE,
                         "stock": {"$gte": item.quantity},
                     },
-                    {
-                        "$inc": {"stock": -item.quantity},
-                        "$set": {"updated_at": datetime.now(timezone.utc)},
-                    },
-                    return_document=True,
-                )
-                if not update_result:
-                    raise HTTPException(
-                        status_code=409,
-                        detail="Product stock was modified by another operation or insufficient stock",
-                    )
-                updated_products.append(
-                    {"product_id": item.product_id, "quantity": item.quantity}
+                    {"$inc": {"stock": -item.quantity}, "$set": {"updated_at": now}},
                 )
+                for item in order.items
+            ],
+            session=session,
+        )
+        if result.matched_count != len(order.items):
+            raise HTTPException(
+                status_code=409,
+                detail="Product stock was modified by another operation or insufficient stock",
+            )
 
-        except Exception as e:
-            # If any update fails, rollback all previous updates
-            for update in updated_products:
-                await self.db.products.find_one_and_update(
-                    {"_id": ObjectId(update["product_id"])},
-                    {
-                        "$inc": {"stock": update["quantity"]},
-                        "$set": {"updated_at": datetime.now(timezone.utc)},
-                    },
-                )
-            raise e
+        if session is None:
+            self.evict_cached_products(item.product_id for item in order.items)
+
+    def evict_cached_products(self, product_ids: Iterable[str]) -> None:
+        """Drop products from the product detail cache"""
+        for product_id in product_ids:
+            _product_cache.delete(product_id)
 
     async def get_categories(self) -> List[str]:
         """Get all unique product categories"""
-        categories = await self.db.products.distinct(
-            "category", {"status": ProductStatus.ACTIVE, "deleted_at": None}
-        )
-        return sorted(categories)
+        categories = _categories_cache.get("categories")
+        if categories is None:
+            categories = sorted(
+                await self.db.products.distinct(
+                    "category", {"status": ProductStatus.ACTIVE, "deleted_at": None}
+                )
+            )
+            _categories_cache.set("categories", categories)
+        return categories
@@ -1,3 +1,4 @@
+import asyncio
 import boto3
 from botocore.exceptions import ClientError
 from fastapi import UploadFile, HTTPException
@@ -16,6 +17,12 @@ class S3Service:
         )
         self.bucket_name = settings.AWS_BUCKET_NAME
 
+    @staticmethod
+    def generate_filename(original_filename: str) -> str:
+        """Generate a unique filename keeping the original extension"""
+        ext = original_filename.split(".")[-1] if "." in original_filename else ""
+        return f"{uuid.uuid4()}.{ext}" if ext else str(uuid.uuid4())
+
     async def upload_file(
         self, file: UploadFile, folder: str = "uploads", filename: Optional[str] = None
     ) -> str:
@@ -30,14 +37,14 @@ class S3Service:
         try:
             # Generate unique filename if not provided
             if not filename:
-                ext = file.filename.split(".")[-1] if "." in file.filename else ""
-                filename = f"{uuid.uuid4()}.{ext}" if ext else str(uuid.uuid4())
+                filename = self.generate_filename(file.filename)
 
             # Create full path
             path = f"{folder}/{filename}"
 
-            # Upload file
-            self.s3_client.upload_fileobj(
+            # Upload file in a worker thread so concurrent uploads can overlap
+            await asyncio.to_thread(
+                self.s3_client.upload_fileobj,
                 file.file,
                 self.bucket_name,
                 path,
@@ -56,6 +63,48 @@ class S3Service:
                 status_code=500, detail=f"Error uploading file: {str(e)}"
             )
 
+    def generate_presigned_post(
+        self,
+        original_filename: str,
+        content_type: str,
+        max_size: int,
+        folder: str = "uploads",
+        expires_in: int = 600,
+    ) -> dict:
+        """
+        Generate a presigned POST so the client uploads straight to S3
+
+        :param original_filename: Client filename, only its extension is kept
+        :param content_type: Content type the upload must use
+        :param max_size: Maximum upload size in bytes
+        :param folder: Folder in bucket
+        :param expires_in: Seconds the presigned POST stays valid
+        :return: POST url and form fields, and the URL the file will have
+        """
+        path = f"{folder}/{self.generate_filename(original_filename)}"
+        try:
+            # Signing happens locally, no request is sent to S3
+            presigned = self.s3_client.generate_presigned_post(
+                self.bucket_name,
+                path,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, max_size],
+                ],
+                ExpiresIn=expires_in,
+            )
+        except ClientError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error creating upload URL: {str(e)}"
+            )
+
+        return {
+            "url": presigned["url"],
+            "fields": presigned["fields"],
+            "file_url": f"{settings.AWS_BUCKET_URL}/{path}",
+        }
+
     async def delete_file(self, file_url: str) -> bool:
         """
         Delete a file from S3 bucket
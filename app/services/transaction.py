@@ -4,57 +4,82 @@ from app.models.transaction import (
     TransactionType,
     TransactionStatus,
 )
-from app.db.mongodb import MongoDB
-from fastapi import HTTPException
+from app.models.money import to_cents
+from app.dependencies.db import get_db
+from app.utils.cache import TTLCache
+from app.utils.dates import utc_now
+from app.utils.pagination import find_page, seek_after
+from fastapi import Depends
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
 from datetime import datetime, timezone
 from bson import Decimal128, ObjectId
 from decimal import Decimal
+from pydantic import TypeAdapter
 from typing import List, Optional
 
 
+_transaction_list_adapter = TypeAdapter(List[TransactionBase])
+
+# Unfiltered transaction totals per user, dropped when the user transacts
+_total_cache = TTLCache(ttl=30, maxsize=4096)
+
+
 class TransactionService:
-    def __init__(self):
-        self.db = MongoDB.get_db()
+    def __init__(self, db: AsyncIOMotorDatabase = Depends(get_db)):
+        self.db = db
 
     async def create_transaction(
         self,
         transaction_data: TransactionCreate,
         user_id: str,
-        current_balance: Decimal,
+        balance: Decimal,
+        session: Optional[AsyncIOMotorClientSession] = None,
     ) -> TransactionBase:
-        """Create a new transaction"""
-
-        new_balance = current_balance
-
-        # Calculate new balance
-        if transaction_data.type in [TransactionType.DEPOSIT, TransactionType.REFUND]:
-            new_balance += transaction_data.amount
-        elif transaction_data.type in [
-            TransactionType.WITHDRAW,
-            TransactionType.PAYMENT,
-        ]:
-            if current_balance < transaction_data.amount:
-                raise HTTPException(status_code=400, detail="Insufficient balance")
-            new_balance -= transaction_data.amount
-
-        # Create transaction
-        transaction = {
-            "user_id": user_id,
-            "type": transaction_data.type,
-            "amount": Decimal128(str(transaction_data.amount)),
-            "balance": Decimal128(str(new_balance)),
-            "status": TransactionStatus.COMPLETED,
-            "description": transaction_data.description,
-            "reference_id": transaction_data.reference_id,
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": None,
-        }
+        """Create a new transaction, balance is the user balance after it
+
+        With a session, the caller evicts the cached total after the
+        transaction commits, see evict_cached_total
+        """
+
+        # Every field is known before the insert, so the response is built
+        # here instead of being read back or validated again
+        transaction = TransactionBase.model_construct(
+            id=str(ObjectId()),
+            user_id=user_id,
+            type=transaction_data.type,
+            amount=transaction_data.amount,
+            balance=to_cents(balance),
+            status=TransactionStatus.COMPLETED,
+            description=transaction_data.description,
+            reference_id=transaction_data.reference_id,
+            created_at=utc_now(),
+            updated_at=None,
+        )
 
         # Insert transaction
-        result = await self.db.transactions.insert_one(transaction)
-        transaction["id"] = str(result.inserted_id)
-
-        return TransactionBase.model_validate(transaction)
+        await self.db.transactions.insert_one(
+            {
+                "_id": ObjectId(transaction.id),
+                "user_id": transaction.user_id,
+                "type": transaction.type,
+                "amount": Decimal128(str(transaction.amount)),
+                "balance": Decimal128(str(transaction.balance)),
+                "status": transaction.status,
+                "description": transaction.description,
+                "reference_id": transaction.reference_id,
+                "created_at": transaction.created_at,
+                "updated_at": transaction.updated_at,
+            },
+            session=session,
+        )
+        if session is None:
+            self.evict_cached_total(user_id)
+
+        return transaction
+
+    def evict_cached_total(self, user_id: str) -> None:
+        """Drop the cached transaction total of a user"""
+        _total_cache.delete(user_id)
 
     async def get_user_transactions(
         self,
@@ -67,10 +92,16 @@ class TransactionService:
         min_amount: Optional[Decimal] = None,
         max_amount: Optional[Decimal] = None,
         status: Optional[TransactionStatus] = None,
-    ) -> tuple[List[TransactionBase], int]:
-        """Get user's transaction history with pagination, filtering and sorting"""
+        after_id: Optional[str] = None,
+    ) -> tuple[List[TransactionBase], Optional[int]]:
+        """Get user's transaction history with pagination, filtering and sorting
 
-        # Build query
+        When after_id is given, transactions are paged by _id after that cursor,
+        see seek_after. The total is None when paging by cursor
+        """
+
+        # Build query, served by the (user_id, [type | status], created_at),
+        # (user_id, amount) and (user_id, _id) indexes
         query = {"user_id": user_id}
         if transaction_type:
             query["type"] = transaction_type
@@ -93,17 +124,29 @@ class TransactionService:
             sort_field = "_id"
         sort_direction = -1 if sort_order == "desc" else 1
 
-        # Get total count
-        total = await self.db.transactions.count_documents(query)
-
-        # Get transactions
-        cursor = self.db.transactions.find(query)
-        cursor = cursor.sort(sort_field, sort_direction)
-        cursor = cursor.skip(skip).limit(limit)
-
-        transactions = []
-        async for doc in cursor:
+        # Only filtered by user, reuse the recent total when there is one
+        user_only = len(query) == 1
+        cached_total = _total_cache.get(user_id) if user_only else None
+
+        if after_id:
+            # Served by the (user_id, _id) index
+            seek_after(query, after_id, sort_direction)
+            sort_field, skip = "_id", 0
+
+        docs, total = await find_page(
+            self.db.transactions,
+            query,
+            [(sort_field, sort_direction)],
+            skip,
+            limit,
+            include_total=not after_id and cached_total is None,
+        )
+        if cached_total is not None and not after_id:
+            total = cached_total
+        elif user_only and total is not None:
+            _total_cache.set(user_id, total)
+
+        for doc in docs:
             doc["id"] = str(doc.pop("_id"))
-            transactions.append(TransactionBase.model_validate(doc))
 
-        return transactions, total
+        return _transaction_list_adapter.validate_python(docs), total
@@ -1,61 +1,89 @@
 from app.models.user import (
     UserBase,
     UserCreate,
+    UserCredentials,
     UserCreateByGoogle,
     UserUpdate,
     UserUpdateByAdmin,
     UserRole,
 )
-from app.db.mongodb import MongoDB
-from fastapi import HTTPException
+from app.models.money import to_cents
+from app.dependencies.db import get_db
+from app.utils.cache import TTLCache
+from app.utils.dates import utc_now
+from app.utils.pagination import find_page, seek_after
+from fastapi import Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
 from datetime import datetime, timezone
 from bson import ObjectId, Decimal128
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from decimal import Decimal
 from typing import List, Optional
 
-from app.utils.auth import create_username, hash_password
+from app.utils.auth import create_username, hash_password, run_password_task
+
+
+# Users by id for authenticated requests, dropped when this service changes them
+_user_cache = TTLCache(ttl=30, maxsize=4096)
+
+
+def _user_from_doc(doc: dict) -> UserBase:
+    """Build a user from a stored document without validating it again
+
+    Users are only written through validated models, so only the values Mongo
+    stores as other types are converted
+    """
+    doc["id"] = str(doc.pop("_id"))
+    doc["balance"] = to_cents(doc["balance"])
+    doc["role"] = UserRole(doc["role"])
+    return UserBase.model_construct(**doc)
+
+
+def _duplicate_user_error(error: DuplicateKeyError) -> HTTPException:
+    """Map a unique username or email index violation to a 400"""
+    key_pattern = (error.details or {}).get("keyPattern", {})
+    field = "Username" if "username" in key_pattern else "Email"
+    return HTTPException(status_code=400, detail=f"{field} already registered")
 
 
 class UserService:
-    def __init__(self):
-        self.db = MongoDB.get_db()
+    def __init__(self, db: AsyncIOMotorDatabase = Depends(get_db)):
+        self.db = db
 
     async def create_user(self, user_data: UserCreate) -> UserBase:
         """Create a new user"""
-        # Check existing username/email
-        if await self.db.users.find_one({"username": user_data.username}):
-            raise HTTPException(status_code=400, detail="Username already registered")
-
-        if await self.db.users.find_one({"email": user_data.email}):
-            raise HTTPException(status_code=400, detail="Email already registered")
-
         # Prepare user data
         user_dict = user_data.model_dump()
         user_dict.update(
             {
-                "password": hash_password(user_dict["password"]),
-                "created_at": datetime.now(timezone.utc),
+                # Hashed in the password pool to keep the event loop free
+                "password": await run_password_task(
+                    hash_password, user_dict["password"]
+                ),
+                "created_at": utc_now(),
                 "updated_at": None,
                 "deleted_at": None,
                 "balance": Decimal128("0.00"),
             }
         )
 
-        # Insert user
-        result = await self.db.users.insert_one(user_dict)
-        created_user = await self.db.users.find_one({"_id": result.inserted_id})
-        created_user["id"] = str(created_user.pop("_id"))
+        # Insert user, insert_one adds the generated _id to user_dict. The
+        # unique username and email indexes reject existing users.
+        try:
+            await self.db.users.insert_one(user_dict)
+        except DuplicateKeyError as e:
+            raise _duplicate_user_error(e)
+        user_dict["id"] = str(user_dict.pop("_id"))
 
-        return UserBase.model_validate(created_user)
+        return UserBase.model_validate(user_dict)
 
     async def create_user_by_google(self, user_data: UserCreateByGoogle) -> UserBase:
         """Create a new user by Google"""
-        if await self.db.users.find_one({"email": user_data.email}):
-            raise HTTPException(status_code=400, detail="Email already registered")
         user_dict = user_data.model_dump()
         user_dict.update(
             {
-                "created_at": datetime.now(timezone.utc),
+                "created_at": utc_now(),
                 "updated_at": None,
                 "deleted_at": None,
                 "balance": Decimal128("0.00"),
@@ -63,20 +91,37 @@ class UserService:
                 "username": create_username(user_dict["name"]),
             }
         )
-        result = await self.db.users.insert_one(user_dict)
-        created_user = await self.db.users.find_one({"_id": result.inserted_id})
-        created_user["id"] = str(created_user.pop("_id"))
+        try:
+            await self.db.users.insert_one(user_dict)
+        except DuplicateKeyError as e:
+            raise _duplicate_user_error(e)
+        user_dict["id"] = str(user_dict.pop("_id"))
 
-        return UserBase.model_validate(created_user)
+        return UserBase.model_validate(user_dict)
 
     async def get_user_by_id(self, user_id: str) -> UserBase:
         """Get user by ID"""
+        cached = _user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
         user = await self.db.users.find_one({"_id": ObjectId(user_id)})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        user["id"] = str(user.pop("_id"))
-        return UserBase.model_validate(user)
+        user = _user_from_doc(user)
+        _user_cache.set(user_id, user)
+        return user
+
+    async def get_balance(self, user_id: str) -> Decimal:
+        """Get the current balance of a user"""
+        user = await self.db.users.find_one(
+            {"_id": ObjectId(user_id)}, projection={"balance": 1}
+        )
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return user["balance"].to_decimal()
 
     async def get_user_by_username(self, username: str) -> UserBase:
         """Get user by username"""
@@ -84,8 +129,21 @@ class UserService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        user["id"] = str(user.pop("_id"))
-        return UserBase.model_validate(user)
+        return _user_from_doc(user)
+
+    async def get_user_credentials(self, username: str) -> Optional[UserCredentials]:
+        """Get the id and password hash of a user, or None if there is no such user"""
+        user = await self.db.users.find_one(
+            {"username": username}, projection={"username": 1, "password": 1}
+        )
+        if not user:
+            return None
+
+        return UserCredentials(
+            id=str(user["_id"]),
+            username=user["username"],
+            password=user.get("password"),
+        )
 
     async def get_user_by_google_id(self, google_id: str) -> UserBase:
         """Get user by Google ID"""
@@ -93,8 +151,7 @@ class UserService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        user["id"] = str(user.pop("_id"))
-        return UserBase.model_validate(user)
+        return _user_from_doc(user)
 
     async def get_user_by_email(self, email: str) -> UserBase:
         """Get user by email"""
@@ -102,8 +159,7 @@ class UserService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        user["id"] = str(user.pop("_id"))
-        return UserBase.model_validate(user)
+        return _user_from_doc(user)
 
     async def update_user(self, user_id: str, user_data: UserUpdate) -> UserBase:
         """Update user data"""
@@ -111,66 +167,88 @@ class UserService:
         if not update_data:
             raise HTTPException(status_code=400, detail="No data to update")
 
-        update_data["updated_at"] = datetime.now(timezone.utc)
-
+        # Only write when a field actually changes, so resubmitting the same
+        # profile doesn't touch updated_at or add an oplog entry
         result = await self.db.users.find_one_and_update(
-            {"_id": ObjectId(user_id)}, {"$set": update_data}, return_document=True
+            {
+                "_id": ObjectId(user_id),
+                "$or": [
+                    {field: {"$ne": value}} for field, value in update_data.items()
+                ],
+            },
+            {"$set": update_data, "$currentDate": {"updated_at": True}},
+            # Both callers respond with UserResponse, which never has these
+            projection={"password": 0, "google_id": 0},
+            return_document=True,
         )
-
         if not result:
-            raise HTTPException(status_code=404, detail="User not found")
+            return await self.get_user_by_id(user_id)
 
-        result["id"] = str(result.pop("_id"))
-        return UserBase.model_validate(result)
+        # Evict after the write, so a concurrent read can't cache the old profile
+        _user_cache.delete(user_id)
+        return _user_from_doc(result)
 
     async def update_balance(
         self,
         user_id: str,
-        current_balance: Decimal,
         amount: Decimal,
         operation: str = "add",
-    ) -> UserBase:
-        """Update user balance (add or subtract)"""
+        session: Optional[AsyncIOMotorClientSession] = None,
+    ) -> Decimal:
+        """Update user balance (add or subtract) and return the new balance
+
+        With a session, the caller evicts the cached user after the transaction
+        commits, see evict_cached_user
+        """
         if operation not in ["add", "subtract"]:
             raise ValueError("Invalid operation. Use 'add' or 'subtract'")
 
-        amount = Decimal(str(amount)).quantize(Decimal("0.01"))
+        amount = to_cents(amount)
         if amount <= 0:
             raise HTTPException(status_code=400, detail="Amount must be positive")
 
-        new_balance = (
-            current_balance + amount if operation == "add" else current_balance - amount
-        )
-
-        if new_balance < 0:
-            raise HTTPException(status_code=400, detail="Balance cannot be negative")
+        query = {"_id": ObjectId(user_id)}
+        if operation == "subtract":
+            # Only match while the balance covers the amount, so concurrent
+            # updates can never take it below zero
+            query["balance"] = {"$gte": Decimal128(str(amount))}
 
         update_result = await self.db.users.find_one_and_update(
-            {"_id": ObjectId(user_id), "balance": Decimal128(str(current_balance))},
+            query,
             {
-                "$set": {
-                    "balance": Decimal128(str(new_balance)),
-                    "updated_at": datetime.now(timezone.utc),
+                "$inc": {
+                    "balance": Decimal128(
+                        str(amount if operation == "add" else -amount)
+                    )
                 },
+                "$currentDate": {"updated_at": True},
             },
-            return_document=True,
+            projection={"balance": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session,
         )
 
         if not update_result:
-            raise HTTPException(
-                status_code=409, detail="Balance was modified by another operation"
-            )
+            if operation == "subtract":
+                raise HTTPException(status_code=400, detail="Insufficient balance")
+            raise HTTPException(status_code=404, detail="User not found")
 
-        update_result["id"] = str(update_result.pop("_id"))
-        return UserBase.model_validate(update_result)
+        if session is None:
+            self.evict_cached_user(user_id)
+        return update_result["balance"].to_decimal()
+
+    def evict_cached_user(self, user_id: str) -> None:
+        """Drop a user from the cache used by authenticated requests"""
+        _user_cache.delete(user_id)
 
     async def soft_delete_user(self, user_id: str) -> bool:
         """Soft delete a user"""
         result = await self.db.users.find_one_and_update(
             {"_id": ObjectId(user_id)},
-            {"$set": {"deleted_at": datetime.now(timezone.utc)}},
+            {"$currentDate": {"deleted_at": True}},
             return_document=True,
         )
+        _user_cache.delete(user_id)
         return bool(result)
 
     async def get_users(
@@ -181,35 +259,35 @@ class UserService:
         sort_order: Optional[str] = "desc",
         search: Optional[str] = None,
         role: Optional[UserRole] = None,
-    ) -> tuple[List[UserBase], int]:
-        """Get users with pagination and filtering"""
+        after_id: Optional[str] = None,
+        include_total: bool = True,
+    ) -> tuple[List[UserBase], Optional[int]]:
+        """Get users with pagination and filtering
+
+        When after_id is given, users are paged by _id after that cursor, see
+        seek_after. The total is None when include_total is False or when paging
+        by cursor
+        """
         # Build query
         query = {"deleted_at": None}
         if search:
-            print("search123", search)
-            query["$or"] = [
-                {"username": {"$regex": search, "$options": "i"}},
-                {"email": {"$regex": search, "$options": "i"}},
-                {"name": {"$regex": search, "$options": "i"}},
-            ]
+            query["$text"] = {"$search": search}
         if role:
             query["role"] = role
 
         # Handle sort parameters
         sort_field = sort_by if sort_by else "created_at"
         sort_direction = -1 if sort_order == "desc" else 1
+        sort = {sort_field: sort_direction}
+        if search and not sort_by:
+            # Order search results by relevance
+            sort = {"score": {"$meta": "textScore"}}
 
-        # Get total count
-        total = await self.db.users.count_documents(query)
-
-        # Get users
-        cursor = self.db.users.find(query)
-        cursor = cursor.sort(sort_field, sort_direction)
-        cursor = cursor.skip(skip).limit(limit)
+        if after_id:
+            seek_after(query, after_id, sort_direction)
+            sort, skip, include_total = {"_id": sort_direction}, 0, False
 
-        users = []
-        async for doc in cursor:
-            doc["id"] = str(doc.pop("_id"))
-            users.append(UserBase.model_validate(doc))
-
-        return users, total
+        docs, total = await find_page(
+            self.db.users, query, sort.items(), skip, limit, include_total
+        )
+        return [_user_from_doc(doc) for doc in docs], total
@@ -0,0 +1,43 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and a size bound
+
+    Entries are evicted oldest first once maxsize is reached. Each worker
+    process has its own cache, so values can be stale for up to ttl seconds
+    after another worker changes them
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value for ttl seconds"""
+        self._data.pop(key, None)
+        if len(self._data) >= self.maxsize:
+            self._data.popitem(last=False)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def delete(self, key: Hashable) -> None:
+        """Drop a cached value"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached values"""
+        self._data.clear()
@@ -1,9 +1,9 @@
 from typing import List
 from app.models.cart import CartBase, CartItemResponse, CartResponse
-from app.models.product import ProductBase
+from app.models.product import ProductSummary
 
 
-def build_cart_response(cart: CartBase, products: List[ProductBase]) -> CartResponse:
+def build_cart_response(cart: CartBase, products: List[ProductSummary]) -> CartResponse:
     product_map = {str(p.id): p for p in products}
     cart_items = []
     for item in cart.items:
@@ -0,0 +1,11 @@
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    """Current UTC time, truncated to the milliseconds MongoDB stores
+
+    Use it for timestamps returned without reading the document back, so they
+    match what later reads return
+    """
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
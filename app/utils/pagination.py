@@ -0,0 +1,102 @@
+import asyncio
+from typing import Any, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.config import settings
+
+# Sorts that follow _id order, so an _id cursor continues them
+CURSOR_SORT_FIELDS = frozenset({"id", "_id", "created_at"})
+
+
+def count_pages(total: Optional[int], size: int) -> Optional[int]:
+    """Number of pages of the given size, None when the total is unknown"""
+    if total is None:
+        return None
+    return (total + size - 1) // size
+
+
+def supports_cursor(sort_by: Optional[str], search: Optional[str] = None) -> bool:
+    """Whether a list sorted by sort_by can be paged by an _id cursor
+
+    Without sort_by lists are sorted by created_at, except searches, which are
+    ordered by relevance
+    """
+    if not sort_by:
+        return not search
+    return sort_by in CURSOR_SORT_FIELDS
+
+
+def check_cursor(
+    after_id: Optional[str], sort_by: Optional[str], search: Optional[str] = None
+) -> None:
+    """Reject a cursor for a list whose order an _id cursor can't continue"""
+    if after_id and not supports_cursor(sort_by, search):
+        raise HTTPException(
+            status_code=400,
+            detail="after_id can only be used when sorting by id or created_at",
+        )
+
+
+def seek_after(query: dict, after_id: str, sort_direction: int) -> None:
+    """Page by _id past the after_id cursor instead of skipping documents
+
+    The caller sorts by _id in sort_direction and drops skip and the total
+    """
+    operator = "$lt" if sort_direction == -1 else "$gt"
+    query["_id"] = {operator: ObjectId(after_id)}
+
+
+async def find_page(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    sort: Sequence[Tuple[str, Any]],
+    skip: int,
+    limit: int,
+    include_total: bool = True,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[int]]:
+    """Fetch one page of documents and, when include_total, the matching total
+
+    A plain find lets the server stop sorting after skip + limit matches. The
+    total stops counting at settings.LIST_COUNT_LIMIT
+    """
+    cursor = collection.find(query, projection=projection)
+    cursor = cursor.sort(list(sort)).skip(skip).limit(limit)
+    if not include_total:
+        return await cursor.to_list(length=limit), None
+
+    # Count concurrently with the page fetch. count_documents stops once it
+    # reaches the cap, so deep filters don't scan everything.
+    docs, total = await asyncio.gather(
+        cursor.to_list(length=limit),
+        collection.count_documents(query, limit=settings.LIST_COUNT_LIMIT),
+    )
+    return docs, total
+
+
+def page_response(
+    items: list,
+    total: Optional[int],
+    page: int,
+    size: int,
+    sort_by: Optional[str],
+    sort_order: Any,
+    cursor: bool = True,
+) -> dict:
+    """Response body of a paginated list endpoint
+
+    next_cursor is only set when cursor is True and the page is full
+    """
+    return {
+        "items": items,
+        "total": total,
+        "total_is_lower_bound": total == settings.LIST_COUNT_LIMIT,
+        "page": page,
+        "size": size,
+        "pages": count_pages(total, size),
+        "sort_by": sort_by,
+        "sort_order": sort_order,
+        "next_cursor": items[-1].id if cursor and len(items) == size else None,
+    }
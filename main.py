@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
 from app.db.mongodb import MongoDB
+from app.dependencies.http import create_http_client
+from app.utils.auth import start_password_pool, stop_password_pool
 from app.api.endpoints import (
     files,
     orders,
@@ -18,11 +21,19 @@ from contextlib import asynccontextmanager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await MongoDB.connect_db()
+    # One pooled client for outbound HTTP, so connections are reused
+    app.state.http_client = create_http_client()
+    # bcrypt runs in separate processes, so logins use every core
+    start_password_pool(settings.PASSWORD_HASH_WORKERS)
     yield
+    stop_password_pool()
+    await app.state.http_client.aclose()
     await MongoDB.close_db()
 
 
-app = FastAPI(lifespan=lifespan)
+# Responses are already reduced to JSON-compatible data by FastAPI, including
+# Decimal and datetime values, so orjson only has to encode the result
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configure CORS
 